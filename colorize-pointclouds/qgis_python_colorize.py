@@ -2,29 +2,166 @@ import subprocess
 import os
 import glob
 import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from qgis.core import QgsRasterFileWriter, QgsRasterPipe, QgsRectangle, QgsProject, QgsRasterLayer
 
-# === FONCTION POUR LIRE L'EMPRISE AVEC PDAL ===
+# Import optionnel laspy (lecture directe de l'en-tête LAS, sans lancer pdal)
+try:
+    import laspy
+    HAS_LASPY = True
+except ImportError:
+    HAS_LASPY = False
+    print("laspy non disponible, lecture de l'emprise via pdal info")
+
+# === FONCTION POUR LIRE L'EMPRISE ===
 def get_lidar_extent(las_file):
-    """Récupère l'emprise d'un fichier LiDAR avec pdal info"""
+    """Récupère l'emprise d'un fichier LiDAR
+    
+    Avec laspy, seul l'en-tête LAS est lu (quelques Ko, aucun point décompressé).
+    Sinon, repli sur pdal info.
+    """
+    if HAS_LASPY:
+        with laspy.open(las_file) as f:
+            h = f.header
+            return {
+                'xmin': float(h.mins[0]),
+                'xmax': float(h.maxs[0]),
+                'ymin': float(h.mins[1]),
+                'ymax': float(h.maxs[1]),
+                'n_points': int(h.point_count)
+            }
+    
     result = subprocess.run(
         ["pdal", "info", "--summary", las_file],
         capture_output=True,
         text=True
     )
     
-    if result.returncode == 0:
-        info = json.loads(result.stdout)
-        bounds = info['summary']['bounds']
-        return {
-            'xmin': bounds['minx'],
-            'xmax': bounds['maxx'],
-            'ymin': bounds['miny'],
-            'ymax': bounds['maxy']
-        }
+    if result.returncode != 0:
+        raise RuntimeError(f"Erreur lecture emprise : {result.stderr}")
+    
+    info = json.loads(result.stdout)
+    bounds = info['summary']['bounds']
+    return {
+        'xmin': bounds['minx'],
+        'xmax': bounds['maxx'],
+        'ymin': bounds['miny'],
+        'ymax': bounds['maxy'],
+        'n_points': int(info['summary'].get('num_points', 0))
+    }
+
+# === RÉSOLUTION DE L'ORTHOPHOTO ===
+def ortho_resolution(extent_dict, default=0.5, min_res=0.2, max_res=1.0):
+    """Résolution (m/pixel) adaptée à la densité du nuage.
+    
+    filters.colorization échantillonne un pixel par point : un pixel plus fin
+    que l'espacement moyen des points (sqrt(surface / nb_points)) est inutile.
+    """
+    n_points = extent_dict.get('n_points', 0)
+    area = (extent_dict['xmax'] - extent_dict['xmin']) * (extent_dict['ymax'] - extent_dict['ymin'])
+    if n_points <= 0 or area <= 0:
+        return default
+    return min(max_res, max(min_res, (area / n_points) ** 0.5))
+
+# === FONCTION D'EXPORT DE L'ORTHOPHOTO (thread principal uniquement) ===
+def export_orthophoto(ortho_layer, extent_dict, temp_orthophoto):
+    """Exporte l'orthophoto QGIS sur l'emprise du LiDAR.
+    
+    Touche à l'API QGIS : doit être appelée depuis le thread principal.
+    """
+    xmin = extent_dict['xmin']
+    xmax = extent_dict['xmax']
+    ymin = extent_dict['ymin']
+    ymax = extent_dict['ymax']
+    
+    print(f"        Emprise : X=[{xmin:.0f}, {xmax:.0f}], Y=[{ymin:.0f}, {ymax:.0f}]")
+    
+    # Créer l'emprise rectangulaire
+    extent_rect = QgsRectangle(xmin, ymin, xmax, ymax)
+    
+    # Calculer les dimensions en pixels (résolution adaptée à la densité, ~0.3-0.5m)
+    resolution = ortho_resolution(extent_dict)
+    width = int((xmax - xmin) / resolution)
+    height = int((ymax - ymin) / resolution)
+    
+    # Limiter la taille
+    max_dim = 10000
+    if width > max_dim or height > max_dim:
+        ratio = max_dim / max(width, height)
+        width = int(width * ratio)
+        height = int(height * ratio)
+    
+    print(f"        Dimensions : {width}x{height} pixels ({resolution:.2f} m/pixel)")
+    
+    # Configuration du pipeline d'export
+    pipe = QgsRasterPipe()
+    provider = ortho_layer.dataProvider()
+    
+    if not pipe.set(provider.clone()):
+        print("        ✗ Erreur configuration pipeline")
+        return False
+    
+    # Export vers GeoTIFF tuilé (blocs 512x512) : PDAL lit par blocs
+    # au lieu de parcourir des lignes complètes
+    file_writer = QgsRasterFileWriter(temp_orthophoto)
+    file_writer.setCreateOptions(["TILED=YES", "COMPRESS=DEFLATE", "BLOCKXSIZE=512", "BLOCKYSIZE=512"])
+    error = file_writer.writeRaster(
+        pipe,
+        width,
+        height,
+        extent_rect,
+        ortho_layer.crs()
+    )
+    
+    if error != QgsRasterFileWriter.NoError:
+        print(f"        ✗ Erreur export : {error}")
+        return False
+    
+    # Vérifier que le fichier existe
+    if not os.path.exists(temp_orthophoto):
+        print(f"        ✗ Fichier orthophoto non créé")
+        return False
+    
+    print(f"        ✓ Orthophoto exportée")
+    return True
+
+# === FONCTIONS DE COLORISATION PDAL (sous-processus non bloquant) ===
+def start_colorize(input_las, output_las, temp_orthophoto):
+    """Lance pdal translate en arrière-plan et rend la main immédiatement"""
+    cmd = [
+        "pdal", "translate",
+        input_las, output_las,
+        "colorization",
+        f"--filters.colorization.raster={temp_orthophoto}"
+    ]
+    
+    # stderr vers un journal par tuile : un PIPE non lu pourrait se remplir et bloquer pdal
+    # (le processus fils garde son propre descripteur, on peut fermer le nôtre)
+    with open(pdal_log_path(temp_orthophoto), "w") as log:
+        return subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=log)
+
+def pdal_log_path(temp_orthophoto):
+    """Journal pdal associé à une tuile (à côté de l'orthophoto temporaire)"""
+    return os.path.splitext(temp_orthophoto)[0] + "_pdal.log"
+
+def finish_colorize(job):
+    """Attend la fin d'un pdal translate, affiche le résultat et supprime l'orthophoto temporaire"""
+    proc, output_las, temp_orthophoto = job
+    log_path = pdal_log_path(temp_orthophoto)
+    returncode = proc.wait()
+    
+    if returncode == 0:
+        print(f"  ✓ Colorisation terminée : {os.path.basename(output_las)}")
+        # Nettoyer
+        for path in (temp_orthophoto, log_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
     else:
-        print(f"    ✗ Erreur lecture emprise : {result.stderr}")
-        return None
+        print(f"  ✗ Erreur PDAL ({os.path.basename(output_las)}), code {returncode}")
+        print(f"        Détails : {log_path}")
 
 # === CONFIGURATION ===
 input_folder = r"C:/XXX/lidar-viewer/public/data/metz"
@@ -70,109 +207,68 @@ else:
         else:
             print(f"✓ Trouvé {len(fichiers_las)} fichiers à traiter\n")
             
-            for i, input_las in enumerate(fichiers_las, 1):
-                print(f"{'='*70}")
-                print(f"Traitement {i}/{len(fichiers_las)} : {os.path.basename(input_las)}")
-                print(f"{'='*70}")
-                
-                # Chemins de sortie
-                basename = os.path.basename(input_las)
-                output_las = os.path.join(output_folder, basename.replace('.copc.laz', '_colorise.copc.laz'))
-                temp_orthophoto = os.path.join(temp_folder, basename.replace('.copc.laz', '_ortho.tif'))
+            # Pipeline en deux étapes :
+            #  (a) lecture des emprises dans un pool de threads
+            #  (b) export QGIS séquentiel dans le thread principal, pendant que les
+            #      pdal translate des tuiles précédentes tournent (Popen, non bloquant)
+            # Le nombre de pdal en cours est borné : au-delà, on attend le plus ancien
+            # avant d'en lancer un nouveau (limite aussi les orthophotos temporaires sur disque)
+            max_workers = max(1, (os.cpu_count() or 2) // 2)
+            max_pdal_jobs = max_workers
+            pdal_jobs = deque()
+            
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                extent_futures = {
+                    executor.submit(get_lidar_extent, input_las): input_las
+                    for input_las in fichiers_las
+                }
                 
-                try:
-                    # 1. LIRE L'EMPRISE DU LIDAR
-                    print("  [1/3] Lecture de l'emprise du LiDAR...")
-                    extent_dict = get_lidar_extent(input_las)
-                    
-                    if not extent_dict:
-                        print("  ✗ Impossible de lire l'emprise, fichier ignoré")
-                        continue
-                    
-                    xmin = extent_dict['xmin']
-                    xmax = extent_dict['xmax']
-                    ymin = extent_dict['ymin']
-                    ymax = extent_dict['ymax']
-                    
-                    print(f"        Emprise : X=[{xmin:.0f}, {xmax:.0f}], Y=[{ymin:.0f}, {ymax:.0f}]")
-                    
-                    # 2. EXPORTER L'ORTHOPHOTO DEPUIS QGIS
-                    print("  [2/3] Export de l'orthophoto depuis QGIS...")
-                    
-                    # Créer l'emprise rectangulaire
-                    extent_rect = QgsRectangle(xmin, ymin, xmax, ymax)
-                    
-                    # Calculer les dimensions en pixels (résolution ~0.2m)
-                    width = int((xmax - xmin) / 0.2)
-                    height = int((ymax - ymin) / 0.2)
-                    
-                    # Limiter la taille
-                    max_dim = 10000
-                    if width > max_dim or height > max_dim:
-                        ratio = max_dim / max(width, height)
-                        width = int(width * ratio)
-                        height = int(height * ratio)
-                    
-                    print(f"        Dimensions : {width}x{height} pixels")
-                    
-                    # Configuration du pipeline d'export
-                    pipe = QgsRasterPipe()
-                    provider = ortho_layer.dataProvider()
-                    
-                    if not pipe.set(provider.clone()):
-                        print("        ✗ Erreur configuration pipeline")
-                        continue
+                for i, extent_future in enumerate(as_completed(extent_futures), 1):
+                    input_las = extent_futures[extent_future]
+                    print(f"{'='*70}")
+                    print(f"Export {i}/{len(fichiers_las)} : {os.path.basename(input_las)}")
+                    print(f"{'='*70}")
                     
-                    # Export vers GeoTIFF
-                    file_writer = QgsRasterFileWriter(temp_orthophoto)
-                    error = file_writer.writeRaster(
-                        pipe,
-                        width,
-                        height,
-                        extent_rect,
-                        ortho_layer.crs()
-                    )
+                    # Chemins de sortie
+                    basename = os.path.basename(input_las)
+                    output_las = os.path.join(output_folder, basename.replace('.copc.laz', '_colorise.copc.laz'))
+                    temp_orthophoto = os.path.join(temp_folder, basename.replace('.copc.laz', '_ortho.tif'))
                     
-                    if error != QgsRasterFileWriter.NoError:
-                        print(f"        ✗ Erreur export : {error}")
-                        continue
-                    
-                    print(f"        ✓ Orthophoto exportée")
-                    
-                    # Vérifier que le fichier existe
-                    if not os.path.exists(temp_orthophoto):
-                        print(f"        ✗ Fichier orthophoto non créé")
-                        continue
-                    
-                    # 3. COLORISATION PDAL
-                    print("  [3/3] Colorisation en cours...")
-                    cmd = [
-                        "pdal", "translate",
-                        input_las, output_las,
-                        "colorization",
-                        f"--filters.colorization.raster={temp_orthophoto}"
-                    ]
-                    
-                    result = subprocess.run(cmd, capture_output=True, text=True)
-                    
-                    if result.returncode == 0:
-                        print(f"        ✓ Colorisation terminée !")
-                        print(f"        Fichier : {os.path.basename(output_las)}")
+                    try:
+                        # 1. LIRE L'EMPRISE DU LIDAR
+                        print("  [1/3] Lecture de l'emprise du LiDAR...")
+                        try:
+                            extent_dict = extent_future.result()
+                        except Exception as e:
+                            print(f"    ✗ {e}")
+                            print("  ✗ Impossible de lire l'emprise, fichier ignoré")
+                            continue
                         
-                        # Nettoyer
-                      a  try:
-                            os.remove(temp_orthophoto)
-                        except:
-                            pass
-                    else:
-                        print(f"        ✗ Erreur PDAL :")
-                        print(f"        {result.stderr}")
+                        # 2. EXPORTER L'ORTHOPHOTO DEPUIS QGIS
+                        print("  [2/3] Export de l'orthophoto depuis QGIS...")
+                        if not export_orthophoto(ortho_layer, extent_dict, temp_orthophoto):
+                            continue
                         
-                except Exception as e:
-                    print(f"  ✗ Erreur : {e}")
-                    import traceback
-                    traceback.print_exc()
-                    continue
+                        # 3. COLORISATION PDAL (en arrière-plan)
+                        while len(pdal_jobs) >= max_pdal_jobs:
+                            finish_colorize(pdal_jobs.popleft())
+                        print("  [3/3] Colorisation lancée en arrière-plan...")
+                        proc = start_colorize(input_las, output_las, temp_orthophoto)
+                        pdal_jobs.append((proc, output_las, temp_orthophoto))
+                        
+                    except Exception as e:
+                        print(f"  ✗ Erreur : {e}")
+                        import traceback
+                        traceback.print_exc()
+                        continue
+                
+            # Attendre les dernières colorisations
+            print(f"\n{'='*70}")
+            print(f"Fin de la colorisation ({len(pdal_jobs)} fichiers en cours)...")
+            print(f"{'='*70}")
+            
+            while pdal_jobs:
+                finish_colorize(pdal_jobs.popleft())
             
             print(f"\n{'='*70}")
             print(f"✓ Traitement terminé !")
@@ -16,6 +16,9 @@ from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 import logging
 import json
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import matplotlib.pyplot as plt
 from sklearn.neighbors import NearestNeighbors
 
@@ -26,56 +29,238 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Cache des rapports par tuile (clé: chemin, mtime, taille)
+CACHE_DIR = Path.home() / ".cache" / "lidar_viewer"
+
+# Import optionnel pykdtree (k-NN multithread en C, bien plus rapide que sklearn en 3D)
+try:
+    from pykdtree.kdtree import KDTree
+    HAS_PYKDTREE = True
+except ImportError:
+    HAS_PYKDTREE = False
+
+# Import optionnel scipy (cKDTree multithread via workers=-1)
+try:
+    from scipy.spatial import cKDTree
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
+if not HAS_PYKDTREE:
+    logger.warning("pykdtree non disponible, k-NN via %s", 'scipy cKDTree' if HAS_SCIPY else 'sklearn')
+
+# Import optionnel cuML (DBSCAN sur GPU)
+try:
+    import cupy as cp
+    from cuml.cluster import DBSCAN as cuDBSCAN
+    HAS_CUML = True
+except ImportError:
+    HAS_CUML = False
+
+# Import optionnel numba (JIT des boucles numériques)
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+def _knn_distances(sample: np.ndarray, k: int) -> np.ndarray:
+    """Distance de chaque point de l'échantillon à son k-ème voisin"""
+    if HAS_PYKDTREE:
+        data = np.ascontiguousarray(sample, dtype=np.float32)
+        distances, _ = KDTree(data).query(data, k=k + 1)  # k + lui-même
+    elif HAS_SCIPY:
+        data = np.ascontiguousarray(sample, dtype=np.float32)
+        distances, _ = cKDTree(data).query(data, k=k + 1, workers=-1)
+    else:
+        nbrs = NearestNeighbors(n_neighbors=k + 1).fit(sample)
+        distances, _ = nbrs.kneighbors(sample)
+
+    return distances[:, k]
+
+
+if HAS_NUMBA:
+    @njit(cache=True)
+    def _find_elbow_indices(k_dist_sorted):
+        """Indices de dérivée max et de |dérivée seconde| max, en une passe"""
+        n = k_dist_sorted.shape[0]
+        idx_1 = 0
+        idx_2 = 0
+        if n < 3:
+            return idx_1, idx_2
+
+        prev_diff = k_dist_sorted[1] - k_dist_sorted[0]
+        max_diff = prev_diff
+        max_second = -1.0
+        for i in range(1, n - 1):
+            diff = k_dist_sorted[i + 1] - k_dist_sorted[i]
+            if diff > max_diff:
+                max_diff = diff
+                idx_1 = i
+            second = abs(diff - prev_diff)
+            if second > max_second:
+                max_second = second
+                idx_2 = i - 1
+            prev_diff = diff
+        return idx_1, idx_2
+else:
+    def _find_elbow_indices(k_dist_sorted):
+        """Indices de dérivée max et de |dérivée seconde| max"""
+        if len(k_dist_sorted) < 3:
+            return 0, 0
+        diffs = np.diff(k_dist_sorted)
+        second_diffs = np.diff(diffs)
+        return int(np.argmax(diffs)), int(np.argmax(np.abs(second_diffs)))
+
 
 class LidarTileAnalyzer:
     """Analyse les caractéristiques d'une tuile LIDAR"""
 
-    def __init__(self, tile_path: Path, sample_fraction: float = 1.0):
+    def __init__(self, tile_path: Path, sample_fraction: float = 1.0,
+                 use_gpu: Optional[bool] = None,
+                 use_cache: bool = True):
         """
         Args:
             tile_path: Chemin du fichier .laz/.copc.laz
             sample_fraction: Fraction de points à analyser (0.0-1.0)
                             Utile pour gros fichiers
+            use_gpu: DBSCAN sur GPU via cuML (None = auto-détection)
+            use_cache: Réutiliser le rapport en cache si la tuile n'a pas changé
         """
         self.tile_path = Path(tile_path)
         self.sample_fraction = sample_fraction
+        self.use_cache = use_cache
+        # Générateur dédié : choice(..., replace=False) sans permutation complète
+        # (algorithme de Floyd quand l'échantillon est petit devant N)
+        self._rng = np.random.default_rng(42)
+        if use_gpu is None:
+            use_gpu = HAS_CUML
+        elif use_gpu and not HAS_CUML:
+            logger.warning("cuML non disponible, DBSCAN sur CPU (Open3D)")
+            use_gpu = False
+        self.use_gpu = use_gpu
         self.results = {}
+        # Origine de la tuile (X, Y) : les points sont stockés en float32 relatifs à
+        # cette origine pour conserver une précision millimétrique
+        self.origin = np.zeros(3)
+        # Cache des k-distances : {(id(points), len, k, sample_size): (points, k_distances)}
+        self._k_distances_cache = {}
+        # Points bâtiments du dernier generate_report (réutilisés pour le graphique)
+        self._building_points = None
+
+    def _cache_path(self, suffix: str, *params) -> Path:
+        """Fichier de cache de la tuile, invalidé dès que le fichier change
+
+        `params` : paramètres supplémentaires du calcul mis en cache
+        (échantillonnage...), inclus dans la clé.
+        """
+        stat = self.tile_path.stat()
+        key = f"{self.tile_path.resolve()}|{stat.st_mtime_ns}|{stat.st_size}|{self.sample_fraction}"
+        if params:
+            key += "|" + "|".join(map(str, params))
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        return CACHE_DIR / f"{self.tile_path.name}.{digest}{suffix}"
+
+    def scan_tile(self, class_ids: Tuple[int, ...] = (6,),
+                  chunk_size: int = 2_000_000) -> Tuple[np.ndarray, Dict]:
+        """Lit la tuile bloc par bloc : points des classes demandées + agrégats globaux
+
+        Le nombre de points, l'emprise et le comptage par classe sont cumulés au fil
+        des blocs ; seuls les points retenus sont conservés en mémoire (typiquement
+        10-20% de la tuile pour les bâtiments) : pic mémoire = un bloc + points gardés.
+        """
+        logger.info("Lecture en flux (classes %s): %s", list(class_ids), self.tile_path.name)
+
+        kept = []
+        n_total = 0
+        raw_mins = np.full(3, np.iinfo(np.int64).max, dtype=np.int64)
+        raw_maxs = np.full(3, np.iinfo(np.int64).min, dtype=np.int64)
+        class_counts = np.zeros(256, dtype=np.int64)
+
+        with laspy.open(str(self.tile_path)) as reader:
+            header = reader.header
+            self.origin = np.array([np.floor(header.mins[0]), np.floor(header.mins[1]), 0.0])
+
+            for chunk in reader.chunk_iterator(chunk_size):
+                n_total += len(chunk)
+                classification = np.asarray(chunk.classification, dtype=np.uint8)
+                class_counts += np.bincount(classification, minlength=256)
+
+                # Emprise sur les entiers bruts (sans matérialiser les coordonnées)
+                for axis, dim in enumerate(('X', 'Y', 'Z')):
+                    raw = np.asarray(chunk[dim])
+                    raw_mins[axis] = min(raw_mins[axis], int(raw.min()))
+                    raw_maxs[axis] = max(raw_maxs[axis], int(raw.max()))
+
+                mask = np.isin(classification, class_ids)
+                n_kept = int(mask.sum())
+                if n_kept == 0:
+                    continue
+
+                pts = np.empty((n_kept, 3), dtype=np.float32)
+                pts[:, 0] = chunk.x[mask] - self.origin[0]
+                pts[:, 1] = chunk.y[mask] - self.origin[1]
+                pts[:, 2] = chunk.z[mask]
+                kept.append(pts)
+
+            scales = np.asarray(header.scales, dtype=np.float64)
+            offsets = np.asarray(header.offsets, dtype=np.float64)
+
+        points = np.concatenate(kept) if kept else np.empty((0, 3), dtype=np.float32)
+        del kept
+
+        if n_total > 0:
+            bbox_min = raw_mins * scales + offsets
+            bbox_max = raw_maxs * scales + offsets
+        else:
+            bbox_min = bbox_max = np.zeros(3)
 
-    def load_tile(self) -> Tuple[np.ndarray, np.ndarray]:
-        """Charge la tuile et ses classifications"""
-        logger.info(f"Chargement: {self.tile_path.name}")
-        las = laspy.read(str(self.tile_path))
-
-        points = np.vstack((las.x, las.y, las.z)).transpose()
-        classifications = np.array(las.classification)
+        stats = {
+            'n_points': n_total,
+            'bbox_min': bbox_min,
+            'bbox_max': bbox_max,
+            'class_counts': class_counts
+        }
 
-        logger.info(f"Total: {len(points):,} points")
-        logger.info(f"Classes: {sorted(np.unique(classifications))}")
+        logger.info("Total: %d points, retenus: %d", n_total, len(points))
 
         # Sampling si demandé
-        if self.sample_fraction < 1.0:
+        if self.sample_fraction < 1.0 and len(points) > 0:
             n_sample = int(len(points) * self.sample_fraction)
-            indices = np.random.choice(len(points), n_sample, replace=False)
+            indices = self._rng.choice(len(points), n_sample, replace=False, shuffle=False)
             points = points[indices]
-            classifications = classifications[indices]
-            logger.info(f"Réduit à {len(points):,} points ({self.sample_fraction*100:.0f}%)")
+            logger.info("Réduit à %d points (%.0f%%)", len(points), self.sample_fraction * 100)
+
+        return points, stats
+
+    def load_tile_filtered(self, class_ids: Tuple[int, ...] = (6,),
+                           chunk_size: int = 2_000_000) -> np.ndarray:
+        """Charge uniquement les points des classes demandées, bloc par bloc"""
+        points, _ = self.scan_tile(class_ids, chunk_size)
+        return points
 
-        return points, classifications
+    def analyze_global_distribution(self, n_points: int,
+                                    bbox_min: np.ndarray,
+                                    bbox_max: np.ndarray) -> Dict:
+        """Analyse la distribution globale des points
 
-    def analyze_global_distribution(self, points: np.ndarray) -> Dict:
-        """Analyse la distribution globale des points"""
+        Args:
+            n_points: Nombre total de points de la tuile
+            bbox_min, bbox_max: Emprise absolue (cumulée pendant la lecture en flux)
+        """
         logger.info("\n📊 ANALYSE GLOBALE")
         logger.info("=" * 60)
 
-        bbox_min = points.min(axis=0)
-        bbox_max = points.max(axis=0)
+        bbox_min = np.asarray(bbox_min, dtype=np.float64)
+        bbox_max = np.asarray(bbox_max, dtype=np.float64)
         bbox_size = bbox_max - bbox_min
 
-        density_m3 = len(points) / (bbox_size[0] * bbox_size[1] * bbox_size[2])
-        density_m2 = len(points) / (bbox_size[0] * bbox_size[1])
+        density_m3 = n_points / (bbox_size[0] * bbox_size[1] * bbox_size[2])
+        density_m2 = n_points / (bbox_size[0] * bbox_size[1])
 
         result = {
-            'n_points': len(points),
+            'n_points': n_points,
             'bbox_min': bbox_min.tolist(),
             'bbox_max': bbox_max.tolist(),
             'bbox_size': bbox_size.tolist(),
@@ -84,16 +269,19 @@ class LidarTileAnalyzer:
             'z_range': float(bbox_size[2])
         }
 
-        logger.info(f"Bounding box: ({bbox_size[0]:.1f} x {bbox_size[1]:.1f} x {bbox_size[2]:.1f}) m")
-        logger.info(f"Densité: {density_m2:.1f} pts/m² (2D)")
-        logger.info(f"Densité: {density_m3:.2f} pts/m³ (3D)")
-        logger.info(f"Hauteur: {bbox_size[2]:.1f} m")
+        logger.info("Bounding box: (%.1f x %.1f x %.1f) m", bbox_size[0], bbox_size[1], bbox_size[2])
+        logger.info("Densité: %.1f pts/m² (2D)", density_m2)
+        logger.info("Densité: %.2f pts/m³ (3D)", density_m3)
+        logger.info("Hauteur: %.1f m", bbox_size[2])
 
         return result
 
-    def analyze_by_classification(self, points: np.ndarray,
-                                  classifications: np.ndarray) -> Dict:
-        """Analyse par classe LAS"""
+    def analyze_by_classification(self, class_counts: np.ndarray) -> Dict:
+        """Analyse par classe LAS
+
+        Args:
+            class_counts: Nombre de points par code de classe (np.bincount)
+        """
         logger.info("\n📋 CLASSES LAS")
         logger.info("=" * 60)
 
@@ -123,41 +311,45 @@ class LidarTileAnalyzer:
         }
 
         result = {}
-        total_points = len(points)
+        counts = np.asarray(class_counts)
+        total_points = int(counts.sum())
+        log_info = logger.isEnabledFor(logging.INFO)
 
-        for class_id in sorted(np.unique(classifications)):
-            mask = classifications == class_id
-            count = np.sum(mask)
+        for class_id in np.nonzero(counts)[0]:
+            class_id = int(class_id)
+            count = int(counts[class_id])
             percentage = 100 * count / total_points
             class_name = class_names.get(class_id, f"Unknown ({class_id})")
 
-            result[int(class_id)] = {
+            result[class_id] = {
                 'name': class_name,
                 'count': count,
                 'percentage': percentage
             }
 
-            if percentage > 1.0:  # Afficher si > 1%
-                logger.info(f" {class_id:2d} ({class_name:25s}): {count:10,} pts ({percentage:5.1f}%)")
+            if log_info and percentage > 1.0:  # Afficher si > 1%
+                logger.info(" %2d (%-25s): %10d pts (%5.1f%%)", class_id, class_name, count, percentage)
 
         return result
 
-    def analyze_buildings_distribution(self, points: np.ndarray,
-                                      classifications: np.ndarray) -> Dict:
-        """Analyse les points classifiés comme bâtiments"""
+    def analyze_buildings_distribution(self, building_points: np.ndarray,
+                                      n_total: int) -> Dict:
+        """Analyse les points classifiés comme bâtiments
+
+        Args:
+            building_points: Points de classe 6 uniquement
+            n_total: Nombre total de points de la tuile (pour le pourcentage)
+        """
         logger.info("\n🏢 ANALYSE BÂTIMENTS (classe 6)")
         logger.info("=" * 60)
 
-        mask = classifications == 6
-        building_points = points[mask]
-
         if len(building_points) == 0:
             logger.warning("Aucun point de bâtiment trouvé!")
             return {'n_points': 0}
 
         # Géométrie
-        bbox_min = building_points.min(axis=0)
-        bbox_max = building_points.max(axis=0)
+        bbox_min = building_points.min(axis=0).astype(np.float64)
+        bbox_max = building_points.max(axis=0).astype(np.float64)
         bbox_size = bbox_max - bbox_min
 
         # Densité spatiale
@@ -166,18 +358,16 @@ class LidarTileAnalyzer:
         density_3d = len(building_points) / volume if volume > 0 else 0
         density_2d = len(building_points) / area if area > 0 else 0
 
-        # Analyse verticale (histogramme hauteurs)
-        z_min, z_max = building_points[:, 2].min(), building_points[:, 2].max()
+        # Analyse verticale (reprend l'emprise, pas de nouveau parcours)
+        z_min, z_max = bbox_min[2], bbox_max[2]
         z_range = z_max - z_min
 
-        # Distribution par tranches
-        n_bins = 10
-        z_bins, z_edges = np.histogram(building_points[:, 2], bins=n_bins)
+        # Percentiles en un seul appel (une sélection partielle, pas de tri complet)
         z_percentiles = np.percentile(building_points[:, 2], [10, 25, 50, 75, 90])
 
         result = {
             'n_points': len(building_points),
-            'percentage_total': 100 * len(building_points) / len(points),
+            'percentage_total': 100 * len(building_points) / n_total,
             'bbox_size': bbox_size.tolist(),
             'z_range': float(z_range),
             'z_min': float(z_min),
@@ -193,35 +383,50 @@ class LidarTileAnalyzer:
             }
         }
 
-        logger.info(f"Points bâtiments: {len(building_points):,} ({100*len(building_points)/len(points):.1f}%)")
-        logger.info(f"Emprise: {bbox_size[0]:.0f} x {bbox_size[1]:.0f} m")
-        logger.info(f"Hauteur: {z_range:.1f} m (min={z_min:.1f}, max={z_max:.1f})")
-        logger.info(f"Densité 2D: {density_2d:.1f} pts/m²")
-        logger.info(f"Densité 3D: {density_3d:.2f} pts/m³")
-        logger.info(f"Percentiles Z: p25={z_percentiles[1]:.1f}, p50={z_percentiles[2]:.1f}, p75={z_percentiles[3]:.1f}")
+        logger.info("Points bâtiments: %d (%.1f%%)", len(building_points), 100 * len(building_points) / n_total)
+        logger.info("Emprise: %.0f x %.0f m", bbox_size[0], bbox_size[1])
+        logger.info("Hauteur: %.1f m (min=%.1f, max=%.1f)", z_range, z_min, z_max)
+        logger.info("Densité 2D: %.1f pts/m²", density_2d)
+        logger.info("Densité 3D: %.2f pts/m³", density_3d)
+        logger.info("Percentiles Z: p25=%.1f, p50=%.1f, p75=%.1f", z_percentiles[1], z_percentiles[2], z_percentiles[3])
 
         return result
 
-    def estimate_point_spacing(self, points: np.ndarray,
-                               sample_size: int = 10000) -> Dict:
-        """Estime l'espacement moyen entre points"""
-        logger.info("\n📐 ESPACEMENT MOYEN")
-        logger.info("=" * 60)
+    def _compute_k_distances(self, points: np.ndarray,
+                             k: int = 4,
+                             sample_size: int = 5000) -> np.ndarray:
+        """k-distances triées (float32) d'un échantillon de points, mises en cache
+
+        estimate_point_spacing et find_elbow_point partagent ainsi un seul calcul
+        k-NN pour un même nuage. La référence à `points` est conservée dans le
+        cache pour que son id() ne puisse pas être réattribué.
+        """
+        key = (id(points), len(points), k, sample_size)
+        cached = self._k_distances_cache.get(key)
+        if cached is not None:
+            return cached[1]
 
         # Sampling pour performance
         if len(points) > sample_size:
-            indices = np.random.choice(len(points), sample_size, replace=False)
+            indices = self._rng.choice(len(points), sample_size, replace=False, shuffle=False)
             sample = points[indices]
         else:
             sample = points
 
-        # Calcul k-NN pour k=4 (2*dim)
-        logger.info("Calcul distances k-NN (k=4)...")
-        nbrs = NearestNeighbors(n_neighbors=5).fit(sample)  # 5 = 4 + lui-même
-        distances, _ = nbrs.kneighbors(sample)
+        logger.info("Calcul distances k-NN (k=%d)...", k)
+        k_distances = np.sort(_knn_distances(sample, k=k).astype(np.float32))
+
+        self._k_distances_cache[key] = (points, k_distances)
+        return k_distances
+
+    def estimate_point_spacing(self, points: np.ndarray,
+                               sample_size: int = 10000) -> Dict:
+        """Estime l'espacement moyen entre points"""
+        logger.info("\n📐 ESPACEMENT MOYEN")
+        logger.info("=" * 60)
 
-        # k-distance = distance au 4ème voisin
-        k_distances = distances[:, 4]
+        # k-distance = distance au 4ème voisin (k=4 = 2*dim)
+        k_distances = self._compute_k_distances(points, k=4, sample_size=sample_size)
 
         stats = {
             'min': float(np.min(k_distances)),
@@ -236,14 +441,71 @@ class LidarTileAnalyzer:
             'p90': float(np.percentile(k_distances, 90))
         }
 
-        logger.info(f"k-distance (k=4) - min: {stats['min']:.2f}m, max: {stats['max']:.2f}m")
-        logger.info(f"k-distance (k=4) - mean: {stats['mean']:.2f}m, median: {stats['median']:.2f}m")
-        logger.info(f"k-distance percentiles:")
-        logger.info(f"  p10: {stats['p10']:.2f}m")
-        logger.info(f"  p25: {stats['p25']:.2f}m")
-        logger.info(f"  p50: {stats['p50']:.2f}m (MÉDIANE)")
-        logger.info(f"  p75: {stats['p75']:.2f}m")
-        logger.info(f"  p90: {stats['p90']:.2f}m")
+        logger.info("k-distance (k=4) - min: %.2fm, max: %.2fm", stats['min'], stats['max'])
+        logger.info("k-distance (k=4) - mean: %.2fm, median: %.2fm", stats['mean'], stats['median'])
+        logger.info("k-distance percentiles:")
+        logger.info("  p10: %.2fm", stats['p10'])
+        logger.info("  p25: %.2fm", stats['p25'])
+        logger.info("  p50: %.2fm (MÉDIANE)", stats['p50'])
+        logger.info("  p75: %.2fm", stats['p75'])
+        logger.info("  p90: %.2fm", stats['p90'])
+
+        return stats
+
+    def _estimate_spacing_grid(self, points: np.ndarray,
+                               voxel: float = 1.0, k: int = 4,
+                               sample_size: Optional[int] = None) -> Dict:
+        """Estime l'espacement à partir d'une grille 2D de densité (O(N), sans k-NN)
+
+        Pour une densité surfacique locale rho, la distance au k-ième voisin
+        vaut en moyenne sqrt(k / (pi * rho)) : les statistiques restent
+        comparables à celles de estimate_point_spacing (k=4). Chaque cellule
+        est pondérée par son nombre de points, comme un échantillon de points.
+
+        Si `sample_size` est donné, les distances sont ramenées à la densité
+        d'un sous-échantillon aléatoire de cette taille (facteur sqrt(N / n)),
+        pour être sur la même échelle qu'un k-NN calculé sur cet échantillon.
+        """
+        logger.info("\n📐 ESPACEMENT MOYEN (grille de densité)")
+        logger.info("=" * 60)
+
+        cells = np.floor(points[:, :2] / voxel).astype(np.int32)
+        cells -= cells.min(axis=0)
+        keys = cells[:, 0].astype(np.int64) * (int(cells[:, 1].max()) + 1) + cells[:, 1]
+        _, counts = np.unique(keys, return_counts=True)
+
+        density = counts / (voxel * voxel)
+        if sample_size is not None and len(points) > sample_size:
+            density = density * (sample_size / len(points))
+        cell_spacing = np.sqrt(k / (np.pi * density))
+
+        # Percentiles pondérés par le nombre de points de chaque cellule
+        order = np.argsort(cell_spacing)
+        cell_spacing = cell_spacing[order]
+        weights = counts[order]
+        cum = np.cumsum(weights) / weights.sum()
+
+        def weighted_percentile(q):
+            return float(cell_spacing[min(np.searchsorted(cum, q / 100.0), len(cum) - 1)])
+
+        stats = {
+            'min': float(cell_spacing[0]),
+            'max': float(cell_spacing[-1]),
+            'mean': float(np.average(cell_spacing, weights=weights)),
+            'median': weighted_percentile(50),
+            'std': float(np.sqrt(np.cov(cell_spacing, aweights=weights))) if len(counts) > 1 else 0.0,
+            'p10': weighted_percentile(10),
+            'p25': weighted_percentile(25),
+            'p50': weighted_percentile(50),
+            'p75': weighted_percentile(75),
+            'p90': weighted_percentile(90)
+        }
+
+        logger.info("Grille %.1fm: %d cellules occupées", voxel, len(counts))
+        logger.info("Espacement (équiv. k=%d) - min: %.2fm, max: %.2fm", k, stats['min'], stats['max'])
+        logger.info("Espacement (équiv. k=%d) - mean: %.2fm, median: %.2fm", k, stats['mean'], stats['median'])
+        logger.info("Percentiles: p10=%.2fm, p25=%.2fm, p75=%.2fm, p90=%.2fm",
+                    stats['p10'], stats['p25'], stats['p75'], stats['p90'])
 
         return stats
 
@@ -251,107 +513,130 @@ class LidarTileAnalyzer:
                         k: int = 4,
                         sample_size: int = 10000) -> float:
         """Trouve le point d'inflexion (elbow) de la courbe k-distance"""
-        logger.info(f"\n🔍 RECHERCHE POINT D'INFLEXION (elbow)")
+        logger.info("\n🔍 RECHERCHE POINT D'INFLEXION (elbow)")
         logger.info("=" * 60)
 
-        # Sampling
-        if len(points) > sample_size:
-            indices = np.random.choice(len(points), sample_size, replace=False)
-            sample = points[indices]
-        else:
-            sample = points
-
-        logger.info(f"Analyse k-distance sur {len(sample):,} points...")
+        logger.info("Analyse k-distance sur %d points...", min(len(points), sample_size))
 
-        nbrs = NearestNeighbors(n_neighbors=k+1).fit(sample)
-        distances, _ = nbrs.kneighbors(sample)
-        k_distances = np.sort(distances[:, k])
+        k_distances = self._compute_k_distances(points, k=k, sample_size=sample_size)
 
         # Méthode 1: Dérivée maximale
-        diffs = np.diff(k_distances)
-        elbow_idx_1 = np.argmax(diffs)
-        elbow_value_1 = k_distances[elbow_idx_1]
-
         # Méthode 2: Courbure maximale (kneedle algorithm approximé)
-        second_diffs = np.diff(diffs)
-        elbow_idx_2 = np.argmax(np.abs(second_diffs))
-        elbow_value_2 = k_distances[elbow_idx_2]
+        elbow_idx_1, elbow_idx_2 = _find_elbow_indices(k_distances)
+        elbow_value_1 = float(k_distances[elbow_idx_1])
+        elbow_value_2 = float(k_distances[elbow_idx_2])
 
         # Utiliser la moyenne des deux méthodes
         elbow_value = (elbow_value_1 + elbow_value_2) / 2
 
-        logger.info(f"Élbow détecté: {elbow_value:.2f}m")
-        logger.info(f"  Méthode 1 (dérivée max): {elbow_value_1:.2f}m")
-        logger.info(f"  Méthode 2 (courbure max): {elbow_value_2:.2f}m")
+        logger.info("Élbow détecté: %.2fm", elbow_value)
+        logger.info("  Méthode 1 (dérivée max): %.2fm", elbow_value_1)
+        logger.info("  Méthode 2 (courbure max): %.2fm", elbow_value_2)
 
         return float(elbow_value)
 
-    def estimate_building_count(self, points: np.ndarray,
-                               classifications: np.ndarray,
-                               eps: float) -> Dict:
-        """Estime le nombre de bâtiments avec un eps donné"""
-        mask = classifications == 6
-        building_points = points[mask]
-
-        if len(building_points) == 0:
-            return {'estimated_buildings': 0}
+    def _building_count_sample(self, building_points: np.ndarray):
+        """Échantillon pour l'estimation DBSCAN, déjà converti pour le backend
 
+        Retourne un tableau cupy (GPU) ou un PointCloud Open3D (CPU), et sa taille.
+        """
         # DBSCAN rapide sur un subset
         sample_size = min(100000, len(building_points))
         if len(building_points) > sample_size:
-            indices = np.random.choice(len(building_points), sample_size, replace=False)
+            indices = self._rng.choice(len(building_points), sample_size, replace=False, shuffle=False)
             sample = building_points[indices]
         else:
             sample = building_points
 
+        if self.use_gpu:
+            return cp.asarray(sample, dtype=cp.float32), len(sample)
+
         pcd = o3d.geometry.PointCloud()
         pcd.points = o3d.utility.Vector3dVector(sample)
+        return pcd, len(sample)
 
+    def _estimate_bc_inner(self, prepared, sample_count: int,
+                           total_building_count: int, eps: float) -> Dict:
+        """DBSCAN sur un échantillon préparé par _building_count_sample"""
         # Tester avec min_points petit pour l'estimation
-        labels = np.array(pcd.cluster_dbscan(
-            eps=eps,
-            min_points=10,
-            print_progress=False
-        ))
+        if self.use_gpu:
+            labels = cuDBSCAN(eps=eps, min_samples=10).fit_predict(prepared)
+            labels = cp.asnumpy(labels)
+        else:
+            labels = np.array(prepared.cluster_dbscan(
+                eps=eps,
+                min_points=10,
+                print_progress=False
+            ))
 
         n_clusters = len(np.unique(labels)) - (1 if -1 in labels else 0)
 
         # Extrapoler au dataset complet
-        estimated_total = int(n_clusters * len(building_points) / len(sample))
+        estimated_total = int(n_clusters * total_building_count / sample_count)
 
         return {
             'estimated_buildings': estimated_total,
             'clusters_in_sample': n_clusters,
-            'sample_size': len(sample)
+            'sample_size': sample_count
         }
 
-    def recommend_parameters(self, points: np.ndarray,
-                             classifications: np.ndarray,
-                             building_points: np.ndarray) -> Dict:
+    def estimate_building_count(self, building_points: np.ndarray,
+                               eps: float) -> Dict:
+        """Estime le nombre de bâtiments avec un eps donné"""
+        if len(building_points) == 0:
+            return {'estimated_buildings': 0}
+
+        prepared, sample_count = self._building_count_sample(building_points)
+        return self._estimate_bc_inner(prepared, sample_count, len(building_points), eps)
+
+    def recommend_parameters(self, building_points: np.ndarray) -> Dict:
         """Recommande les paramètres DBSCAN optimaux"""
         logger.info("\n💡 RECOMMANDATIONS DBSCAN")
         logger.info("=" * 60)
 
-        # Analyser l'espacement
-        spacing = self.estimate_point_spacing(building_points, sample_size=5000)
+        # Elbow et espacement à la même densité : le k-NN de l'elbow porte sur
+        # un sous-échantillon, la grille est ramenée à la densité de cet échantillon
+        sample_size = 5000
 
-        # Trouver elbow
-        elbow = self.find_elbow_point(building_points, k=4, sample_size=5000)
+        # Analyser l'espacement (grille de densité, sur tout le nuage)
+        spacing = self._estimate_spacing_grid(building_points, sample_size=sample_size)
 
-        # Recommandations basées sur la densité
-        density_2d = len(building_points) / (
+        # Trouver elbow (seul usage restant du k-NN)
+        elbow = self.find_elbow_point(building_points, k=4, sample_size=sample_size)
+
+        # Recommandations basées sur la densité (float Python : les points sont en
+        # float32 et un np.float32 serait sérialisé en chaîne par json.dump(default=str))
+        density_2d = float(len(building_points) / (
             (building_points[:, 0].max() - building_points[:, 0].min()) *
             (building_points[:, 1].max() - building_points[:, 1].min())
-        )
+        ))
 
-        logger.info(f"\nParamètres basés sur densité: {density_2d:.1f} pts/m²")
+        logger.info("\nParamètres basés sur densité: %.1f pts/m²", density_2d)
 
         recommendations = []
 
-        # Recommandation 1: Conservateur (peu de fusion)
         eps_1 = min(spacing['p25'] * 1.2, elbow * 0.8)
+        eps_2 = elbow
+        eps_3 = spacing['p75'] * 1.5
+
+        # Un seul échantillon (et un seul PointCloud) pour les trois eps
+        prepared, sample_count = self._building_count_sample(building_points)
+        n_building = len(building_points)
+        if self.use_gpu:
+            est_1, est_2, est_3 = [
+                self._estimate_bc_inner(prepared, sample_count, n_building, eps)
+                for eps in (eps_1, eps_2, eps_3)
+            ]
+        else:
+            # Open3D relâche le GIL pendant cluster_dbscan : les trois eps en parallèle
+            with ThreadPoolExecutor(max_workers=3) as pool:
+                est_1, est_2, est_3 = pool.map(
+                    lambda eps: self._estimate_bc_inner(prepared, sample_count, n_building, eps),
+                    (eps_1, eps_2, eps_3)
+                )
+
+        # Recommandation 1: Conservateur (peu de fusion)
         min_pts_1 = max(15, int(np.sqrt(len(building_points)) / 500))
-        est_1 = self.estimate_building_count(points, classifications, eps_1)
 
         recommendations.append({
             'strategy': 'Conservateur (min fusion)',
@@ -362,16 +647,14 @@ class LidarTileAnalyzer:
             'quality': 'Bonne séparation, peu de fusions'
         })
 
-        logger.info(f"\n1️⃣  CONSERVATEUR")
-        logger.info(f"    eps: {eps_1:.2f}m")
-        logger.info(f"    min_points: {min_pts_1}")
-        logger.info(f"    → ~{est_1['estimated_buildings']} bâtiments estimés")
-        logger.info(f"    → Bonne séparation, peu de fusions")
+        logger.info("\n1️⃣  CONSERVATEUR")
+        logger.info("    eps: %.2fm", eps_1)
+        logger.info("    min_points: %d", min_pts_1)
+        logger.info("    → ~%d bâtiments estimés", est_1['estimated_buildings'])
+        logger.info("    → Bonne séparation, peu de fusions")
 
         # Recommandation 2: Équilibré (recommandé)
-        eps_2 = elbow
         min_pts_2 = max(20, int(np.sqrt(len(building_points)) / 400))
-        est_2 = self.estimate_building_count(points, classifications, eps_2)
 
         recommendations.append({
             'strategy': 'Équilibré (RECOMMANDÉ)',
@@ -382,16 +665,14 @@ class LidarTileAnalyzer:
             'quality': 'Bon compromis séparation/connexion'
         })
 
-        logger.info(f"\n2️⃣  ÉQUILIBRÉ (RECOMMANDÉ)")
-        logger.info(f"    eps: {eps_2:.2f}m")
-        logger.info(f"    min_points: {min_pts_2}")
-        logger.info(f"    → ~{est_2['estimated_buildings']} bâtiments estimés")
-        logger.info(f"    → Bon compromis séparation/connexion")
+        logger.info("\n2️⃣  ÉQUILIBRÉ (RECOMMANDÉ)")
+        logger.info("    eps: %.2fm", eps_2)
+        logger.info("    min_points: %d", min_pts_2)
+        logger.info("    → ~%d bâtiments estimés", est_2['estimated_buildings'])
+        logger.info("    → Bon compromis séparation/connexion")
 
         # Recommandation 3: Agressif (permet fusion)
-        eps_3 = spacing['p75'] * 1.5
         min_pts_3 = max(10, int(np.sqrt(len(building_points)) / 600))
-        est_3 = self.estimate_building_count(points, classifications, eps_3)
 
         recommendations.append({
             'strategy': 'Agressif (fusion acceptable)',
@@ -402,11 +683,11 @@ class LidarTileAnalyzer:
             'quality': 'Moins de fragments, quelques fusions possibles'
         })
 
-        logger.info(f"\n3️⃣  AGRESSIF (fusion acceptable)")
-        logger.info(f"    eps: {eps_3:.2f}m")
-        logger.info(f"    min_points: {min_pts_3}")
-        logger.info(f"    → ~{est_3['estimated_buildings']} bâtiments estimés")
-        logger.info(f"    → Moins de fragments, quelques fusions possibles")
+        logger.info("\n3️⃣  AGRESSIF (fusion acceptable)")
+        logger.info("    eps: %.2fm", eps_3)
+        logger.info("    min_points: %d", min_pts_3)
+        logger.info("    → ~%d bâtiments estimés", est_3['estimated_buildings'])
+        logger.info("    → Moins de fragments, quelques fusions possibles")
 
         return {
             'spacing': spacing,
@@ -421,19 +702,37 @@ class LidarTileAnalyzer:
         logger.info("ANALYSE TUILE LIDAR - CALIBRATION DBSCAN")
         logger.info("=" * 70)
 
-        # Charger
-        points, classifications = self.load_tile()
+        cache_file = self._cache_path('.report.json')
+        if self.use_cache and cache_file.exists():
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    report = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("Cache illisible (%s), nouvelle analyse", e)
+            else:
+                logger.info("Tuile inchangée, rapport en cache: %s", cache_file)
+                # Rapport servi depuis le cache : date du jour, date de l'analyse conservée
+                report['cached_analysis_date'] = report.get('analysis_date')
+                report['analysis_date'] = str(np.datetime64('today'))
+                report['from_cache'] = True
+                self.results = report
+                self._log_summary(report)
+                self._save_report(report, output_path)
+                return report
+
+        # Lecture en flux : agrégats globaux + points bâtiments uniquement
+        building_points, tile_stats = self.scan_tile(class_ids=(6,))
+        self._building_points = building_points
 
         # Analyses
-        global_analysis = self.analyze_global_distribution(points)
-        classification_analysis = self.analyze_by_classification(points, classifications)
-        building_analysis = self.analyze_buildings_distribution(points, classifications)
-
-        mask = classifications == 6
-        building_points = points[mask]
+        global_analysis = self.analyze_global_distribution(
+            tile_stats['n_points'], tile_stats['bbox_min'], tile_stats['bbox_max']
+        )
+        classification_analysis = self.analyze_by_classification(tile_stats['class_counts'])
+        building_analysis = self.analyze_buildings_distribution(building_points, tile_stats['n_points'])
 
         if len(building_points) > 0:
-            params = self.recommend_parameters(points, classifications, building_points)
+            params = self.recommend_parameters(building_points)
         else:
             params = {'recommendations': []}
 
@@ -449,18 +748,37 @@ class LidarTileAnalyzer:
 
         self.results = report
 
-        # Affichage résumé
+        if self.use_cache:
+            try:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(cache_file, 'w', encoding='utf-8') as f:
+                    json.dump(report, f, ensure_ascii=False, default=str)
+            except OSError as e:
+                logger.warning("Impossible d'écrire le cache: %s", e)
+
+        self._log_summary(report)
+        self._save_report(report, output_path)
+
+        return report
+
+    def _log_summary(self, report: Dict):
+        """Affiche le résumé des recommandations"""
+        if not logger.isEnabledFor(logging.INFO):
+            return
+
         logger.info("\n" + "=" * 70)
         logger.info("📄 RÉSUMÉ RECOMMANDATIONS")
         logger.info("=" * 70)
 
+        params = report.get('dbscan_parameters', {})
         if params.get('recommendations'):
             for i, rec in enumerate(params['recommendations'], 1):
-                logger.info(f"\nOption {i}: {rec['strategy']}")
-                logger.info(f"  eps = {rec['eps']:.2f}m,  min_points = {rec['min_points']}")
-                logger.info(f"  Estimé: ~{rec['estimated_buildings']} bâtiments")
+                logger.info("\nOption %d: %s", i, rec['strategy'])
+                logger.info("  eps = %.2fm,  min_points = %d", rec['eps'], rec['min_points'])
+                logger.info("  Estimé: ~%d bâtiments", rec['estimated_buildings'])
 
-        # Sauvegarder
+    def _save_report(self, report: Dict, output_path: Optional[Path]):
+        """Sauvegarde le rapport JSON"""
         if output_path:
             output_path = Path(output_path)
             output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -468,25 +786,46 @@ class LidarTileAnalyzer:
             with open(output_path, 'w', encoding='utf-8') as f:
                 json.dump(report, f, indent=2, ensure_ascii=False, default=str)
 
-            logger.info(f"\n✓ Rapport: {output_path}")
+            logger.info("\n✓ Rapport: %s", output_path)
 
-        return report
+    def plot_k_distance_curve(self, points: Optional[np.ndarray],
+                             output_path: Optional[Path] = None,
+                             voxel_size: float = 0.3,
+                             max_sample_size: int = 50000):
+        """Plot la courbe k-distance
 
-    def plot_k_distance_curve(self, points: np.ndarray,
-                             output_path: Optional[Path] = None):
-        """Plot la courbe k-distance"""
+        Les k-distances sont mises en cache (.npy) : `points` peut être None
+        si la tuile a déjà été analysée.
+        """
         logger.info("\n📈 Génération graphique k-distance...")
 
-        sample_size = min(50000, len(points))
-        if len(points) > sample_size:
-            indices = np.random.choice(len(points), sample_size, replace=False)
-            sample = points[indices]
+        cache_file = self._cache_path('.kdist.npy', voxel_size, max_sample_size)
+        if self.use_cache and cache_file.exists():
+            k_distances = np.load(cache_file)
+        elif points is None or len(points) == 0:
+            logger.warning("Aucun point ni k-distances en cache, graphique ignoré")
+            return
         else:
-            sample = points
-
-        nbrs = NearestNeighbors(n_neighbors=5).fit(sample)
-        distances, _ = nbrs.kneighbors(sample)
-        k_distances = np.sort(distances[:, 4])
+            # Sous-échantillonnage voxel (taille ~ eps attendu) : échantillon
+            # spatialement uniforme, courbe plus nette qu'un tirage aléatoire
+            pcd = o3d.geometry.PointCloud()
+            pcd.points = o3d.utility.Vector3dVector(points)
+            sample = np.asarray(pcd.voxel_down_sample(voxel_size=voxel_size).points)
+            del pcd
+
+            # Garde-fou pour les très grandes emprises
+            if len(sample) > max_sample_size:
+                indices = self._rng.choice(len(sample), max_sample_size, replace=False, shuffle=False)
+                sample = sample[indices]
+
+            k_distances = np.sort(_knn_distances(sample, k=4))
+
+            if self.use_cache:
+                try:
+                    cache_file.parent.mkdir(parents=True, exist_ok=True)
+                    np.save(cache_file, k_distances)
+                except OSError as e:
+                    logger.warning("Impossible d'écrire le cache: %s", e)
 
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
 
@@ -516,13 +855,50 @@ class LidarTileAnalyzer:
             output_path = Path(output_path)
             output_path.parent.mkdir(parents=True, exist_ok=True)
             plt.savefig(output_path, dpi=150, bbox_inches='tight')
-            logger.info(f"✓ Graphique: {output_path}")
+            logger.info("✓ Graphique: %s", output_path)
         else:
             plt.show()
 
         plt.close()
 
 
+def _tile_stem(tile_file: Path) -> str:
+    """Nom de la tuile sans extension .laz / .copc.laz"""
+    name = tile_file.name
+    for suffix in ('.laz', '.copc'):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name
+
+
+def analyze_one(tile_file: Path, output_dir: Path) -> Dict:
+    """Analyse complète d'une tuile : rapport JSON + graphique k-distance
+
+    Fonction de module (picklable) pour être exécutée dans un processus du pool.
+    """
+    tile_file = Path(tile_file)
+    output_dir = Path(output_dir)
+    stem = _tile_stem(tile_file)
+
+    logger.info("\nAnalyse de: %s", tile_file.name)
+
+    analyzer = LidarTileAnalyzer(tile_file, sample_fraction=1.0)
+
+    report = analyzer.generate_report(
+        output_path=output_dir / f"{stem}_report.json"
+    )
+
+    # Graphique (points bâtiments déjà chargés par generate_report,
+    # ou k-distances en cache si le rapport venait lui-même du cache)
+    if report.get('buildings', {}).get('n_points', 0) > 0:
+        analyzer.plot_k_distance_curve(
+            analyzer._building_points,
+            output_path=output_dir / f"{stem}_k_distance_curve.png"
+        )
+
+    return report
+
+
 def main():
     """Point d'entrée principal"""
 
@@ -532,49 +908,68 @@ def main():
     # Trouver les fichiers .laz
     data_dir = project_root / "public" / "data" / "metz"
     if not data_dir.exists():
-        logger.error(f"Dossier non trouvé: {data_dir}")
+        logger.error("Dossier non trouvé: %s", data_dir)
         logger.info("Usage: python analyze_lidar_tile.py /path/to/file.laz")
         return
 
-    laz_files = list(data_dir.glob("*.laz")) + list(data_dir.glob("*.copc.laz"))
+    # *.laz couvre aussi *.copc.laz (trié pour un ordre déterministe)
+    laz_files = sorted(data_dir.glob("*.laz"))
 
     if not laz_files:
-        logger.error(f"Aucun fichier .laz trouvé dans {data_dir}")
+        logger.error("Aucun fichier .laz trouvé dans %s", data_dir)
         return
 
-    # Analyser le premier fichier
-    tile_file = laz_files[0]
-    logger.info(f"\nAnalyse de: {tile_file.name}")
-
-    # Créer l'analyseur
-    analyzer = LidarTileAnalyzer(tile_file, sample_fraction=1.0)
-
-    # Générer le rapport
-    report = analyzer.generate_report(
-        output_path=data_dir.parent / "tile_analysis_report.json"
-    )
-
-    # Générer le graphique
-    points, _ = analyzer.load_tile()
-    mask = np.array(laspy.read(str(tile_file)).classification) == 6
-    building_points = points[mask]
-
-    if len(building_points) > 0:
-        analyzer.plot_k_distance_curve(
-            building_points,
-            output_path=data_dir.parent / "k_distance_curve.png"
-        )
+    output_dir = data_dir.parent / "tile_analysis"
+
+    # Un processus par tuile, limité à la moitié des cœurs :
+    # chaque worker peut monter à plusieurs Go en chargeant une tuile COPC
+    max_workers = max(1, min(len(laz_files), (os.cpu_count() or 2) // 2))
+    logger.info("\n%d tuiles à analyser (%d processus)", len(laz_files), max_workers)
+
+    reports = {}
+    if max_workers == 1:
+        for tile_file in laz_files:
+            reports[tile_file] = analyze_one(tile_file, output_dir)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(analyze_one, tile_file, output_dir): tile_file
+                for tile_file in laz_files
+            }
+            for future in as_completed(futures):
+                tile_file = futures[future]
+                try:
+                    reports[tile_file] = future.result()
+                except Exception as e:
+                    logger.error("✗ Échec analyse %s: %s", tile_file.name, e)
+
+    # Rapport agrégé (ordre des fichiers)
+    summary = {
+        'n_tiles': len(reports),
+        'tiles': [reports[f] for f in laz_files if f in reports]
+    }
+    summary_path = data_dir.parent / "tile_analysis_report.json"
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False, default=str)
 
     logger.info("\n" + "=" * 70)
     logger.info("✓ ANALYSE TERMINÉE")
     logger.info("=" * 70)
+    logger.info("Rapport agrégé: %s", summary_path)
+    logger.info("Rapports par tuile: %s", output_dir)
+
+    if not logger.isEnabledFor(logging.INFO):
+        return
+
     logger.info("\nUtilisez ces paramètres dans process_buildings_improved.py :")
-    if report.get('dbscan_parameters', {}).get('recommendations'):
-        rec = report['dbscan_parameters']['recommendations'][1]  # Équilibré
-        logger.info(f"\n  processor = ImprovedBuildingProcessor(")
-        logger.info(f"      dbscan_eps = {rec['eps']:.2f},")
-        logger.info(f"      dbscan_min_points = {rec['min_points']}")
-        logger.info(f"  )")
+    for report in summary['tiles']:
+        if report.get('dbscan_parameters', {}).get('recommendations'):
+            rec = report['dbscan_parameters']['recommendations'][1]  # Équilibré
+            logger.info("\n  # %s", report['file'])
+            logger.info("  processor = ImprovedBuildingProcessor(")
+            logger.info("      dbscan_eps = %.2f,", rec['eps'])
+            logger.info("      dbscan_min_points = %d", rec['min_points'])
+            logger.info("  )")
 
 
 if __name__ == "__main__":
@@ -13,15 +13,21 @@ import numpy as np
 import open3d as o3d
 import laspy
 import json
+import hashlib
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 import logging
-from shapely.geometry import Polygon, MultiPolygon, Point
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import shapely
+from shapely.geometry import Polygon, MultiPolygon, MultiPoint
 from shapely.ops import unary_union
-import alphashape
 from tqdm import tqdm
 from sklearn.cluster import DBSCAN
+from joblib import Parallel, delayed
 import gc
 
 # Configuration logging
@@ -31,9 +37,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Cache des points bâtiments par tuile (invalidé par la date de modification du LAZ)
+CACHE_DIR = Path.home() / ".cache" / "lidar_viewer"
+
 # Import optionnel scipy
 try:
-    from scipy.spatial import ConvexHull
+    from scipy.spatial import ConvexHull, Delaunay, cKDTree
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import connected_components
     HAS_SCIPY = True
 except ImportError:
     HAS_SCIPY = False
@@ -46,6 +57,316 @@ except ImportError:
     HAS_TRIANGLE = False
     logger.warning("triangle non disponible")
 
+# Import optionnel pandas (export Parquet des métadonnées)
+try:
+    import pandas as pd
+    HAS_PANDAS = True
+except ImportError:
+    HAS_PANDAS = False
+
+# Import optionnel numba (JIT des boucles numériques)
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# API tenseur Open3D sur GPU (build CUDA)
+try:
+    HAS_CUDA = o3d.core.cuda.is_available()
+except AttributeError:
+    HAS_CUDA = False
+
+
+if HAS_NUMBA:
+    @njit(cache=True)
+    def _dbscan_expand(indptr, indices, core_mask):
+        """Expansion DBSCAN (parcours en profondeur itératif) sur un graphe CSR"""
+        n = len(core_mask)
+        labels = np.full(n, -1, dtype=np.int32)
+        stack = np.empty(n, dtype=np.int64)  # chaque point est empilé au plus une fois
+        cluster_id = 0
+        for i in range(n):
+            if labels[i] != -1 or not core_mask[i]:
+                continue
+            labels[i] = cluster_id
+            stack[0] = i
+            top = 1
+            while top > 0:
+                top -= 1
+                p = stack[top]
+                for j in range(indptr[p], indptr[p + 1]):
+                    q = indices[j]
+                    if labels[q] == -1:
+                        labels[q] = cluster_id
+                        # Seuls les points cœurs propagent le cluster
+                        if core_mask[q]:
+                            stack[top] = q
+                            top += 1
+            cluster_id += 1
+        return labels
+
+
+if HAS_NUMBA:
+    @njit(cache=True)
+    def _building_stats(p, z_pct, n_bins):
+        """Statistiques d'un bâtiment en passes compilées (pas de tableaux temporaires)
+
+        Retourne (mins, maxs, moyenne, z_pct, étendue X, étendue Y de l'emprise)
+        où l'emprise est l'ensemble des points sous le percentile Z, estimé
+        par histogramme (pas de tri).
+        """
+        n = p.shape[0]
+        mins = np.empty(3)
+        maxs = np.empty(3)
+        sums = np.zeros(3)
+        for k in range(3):
+            mins[k] = p[0, k]
+            maxs[k] = p[0, k]
+        for i in range(n):
+            for k in range(3):
+                v = p[i, k]
+                sums[k] += v
+                if v < mins[k]:
+                    mins[k] = v
+                if v > maxs[k]:
+                    maxs[k] = v
+
+        # Percentile Z par histogramme sur [zmin, zmax]
+        z_min = mins[2]
+        z_span = maxs[2] - z_min
+        z_q = z_min
+        if z_span > 0:
+            hist = np.zeros(n_bins, dtype=np.int64)
+            scale = n_bins / z_span
+            for i in range(n):
+                b = int((p[i, 2] - z_min) * scale)
+                if b >= n_bins:
+                    b = n_bins - 1
+                hist[b] += 1
+            target = z_pct / 100.0 * (n - 1)
+            cum = 0
+            for b in range(n_bins):
+                if cum + hist[b] > target:
+                    z_q = z_min + (b + (target - cum) / hist[b]) / scale
+                    break
+                cum += hist[b]
+
+        # Emprise : étendue XY des points sous le percentile
+        fx_min = np.inf
+        fx_max = -np.inf
+        fy_min = np.inf
+        fy_max = -np.inf
+        for i in range(n):
+            if p[i, 2] < z_q:
+                if p[i, 0] < fx_min:
+                    fx_min = p[i, 0]
+                if p[i, 0] > fx_max:
+                    fx_max = p[i, 0]
+                if p[i, 1] < fy_min:
+                    fy_min = p[i, 1]
+                if p[i, 1] > fy_max:
+                    fy_max = p[i, 1]
+        if fx_max < fx_min:
+            x_range = 0.0
+            y_range = 0.0
+        else:
+            x_range = fx_max - fx_min
+            y_range = fy_max - fy_min
+
+        return mins, maxs, sums / n, z_q, x_range, y_range
+
+
+def _dbscan_radius_graph(points: np.ndarray, eps: float, min_points: int,
+                         max_graph_entries: int = 40_000_000) -> np.ndarray:
+    """DBSCAN sur un graphe de voisinage précalculé par cKDTree
+
+    Les paires à distance <= eps sont obtenues en un seul parcours du kd-tree
+    (bien plus rapide que le ball_tree de sklearn en 2D/3D). Avec numba, la
+    propagation des clusters se fait directement sur le graphe CSR ; sinon le
+    graphe est passé à DBSCAN sous forme de matrice creuse des distances.
+    Empreinte mémoire : une entrée par paire orientée (COO, puis CSR), sans
+    tableaux de paires concaténés ni tri.
+    """
+    tree = cKDTree(points, leafsize=32, balanced_tree=False, compact_nodes=False)
+
+    # Budget mémoire : comptage seul (pas de listes), puis repli sur le DBSCAN
+    # ball_tree de sklearn si le graphe dépasse ~1 Go (eps grand, cellule dense)
+    n_entries = int(tree.query_ball_point(points, eps, return_length=True).sum())
+    if n_entries > max_graph_entries:
+        clustering = DBSCAN(eps=eps, min_samples=min_points, algorithm='ball_tree', n_jobs=1)
+        return clustering.fit_predict(points)
+
+    # Graphe symétrique (i, j) et (j, i), diagonale comprise, produit directement
+    # en COO puis converti en CSR : pas de tableaux de paires dupliqués ni de tri
+    graph = tree.sparse_distance_matrix(tree, eps, output_type='coo_matrix').tocsr()
+
+    if HAS_NUMBA:
+        # Point cœur : au moins min_points voisins, lui-même compris (comme sklearn) ;
+        # le point lui-même est déjà dans sa ligne (distance 0)
+        core_mask = np.diff(graph.indptr) >= min_points
+        return _dbscan_expand(graph.indptr, graph.indices, core_mask)
+
+    clustering = DBSCAN(eps=eps, min_samples=min_points, metric='precomputed')
+    return clustering.fit_predict(graph)
+
+
+def _alpha_shape_2d(points_2d: np.ndarray, alpha: float):
+    """Alpha shape 2D : union des triangles de Delaunay de rayon circonscrit < 1/alpha
+
+    Même critère que alphashape.alphashape, mais le filtrage des triangles est
+    vectorisé et l'union faite en un seul appel GEOS.
+    """
+    if not HAS_SCIPY:
+        # Concave hull GEOS (shapely >= 2.0, GEOS >= 3.11)
+        return shapely.concave_hull(MultiPoint(points_2d), ratio=0.1, allow_holes=True)
+
+    simplices = Delaunay(points_2d).simplices
+    a = points_2d[simplices[:, 0]]
+    b = points_2d[simplices[:, 1]]
+    c = points_2d[simplices[:, 2]]
+
+    # R = |ab| |bc| |ca| / (4 * aire)
+    len_ab = np.linalg.norm(b - a, axis=1)
+    len_bc = np.linalg.norm(c - b, axis=1)
+    len_ca = np.linalg.norm(a - c, axis=1)
+    double_area = np.abs((b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) -
+                         (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0]))
+    valid = double_area > 0
+    radius = np.full(len(simplices), np.inf)
+    radius[valid] = len_ab[valid] * len_bc[valid] * len_ca[valid] / (2.0 * double_area[valid])
+
+    keep = radius < 1.0 / alpha
+    triangles = shapely.polygons(points_2d[simplices[keep]])
+    return unary_union(triangles)
+
+
+def _downsample_points(points: np.ndarray,
+                       target_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Sous-échantillonnage voxel, retourne (points_downsampled, indices_originaux)
+
+    Un seul passage : chaque point reçoit la clé de son voxel, et le premier
+    point de chaque voxel le représente. Les indices originaux sont donc connus
+    directement (pas de kd-tree sur le nuage complet pour les retrouver).
+    """
+    if len(points) <= target_size:
+        return points, np.arange(len(points))
+
+    # Calculer la taille de voxel appropriée
+    mins = points.min(axis=0).astype(np.float64)
+    maxs = points.max(axis=0).astype(np.float64)
+    diagonal = np.linalg.norm(maxs - mins)
+    voxel_size = diagonal / np.cbrt(target_size)
+
+    # Clé de voxel exacte (pas de collision) : indices 3D linéarisés
+    keys = np.floor((points - mins) / voxel_size).astype(np.int64)
+    dims = keys.max(axis=0) + 1
+    packed = (keys[:, 0] * dims[1] + keys[:, 1]) * dims[2] + keys[:, 2]
+
+    _, first_idx = np.unique(packed, return_index=True)
+
+    return points[first_idx], first_idx
+
+
+def _cluster_one_cell(points: np.ndarray,
+                      indices: np.ndarray,
+                      eps: float,
+                      min_points: int,
+                      max_points_per_cluster: int,
+                      workers: int = 1) -> List[np.ndarray]:
+    """DBSCAN sur une cellule de grille (exécuté dans un worker joblib)
+
+    `points` est le nuage complet : joblib le partage entre workers par memmap
+    au lieu de le sérialiser, seuls les indices de la cellule sont transmis.
+    `workers` : threads des requêtes kd-tree (1 quand les cellules sont déjà
+    réparties sur plusieurs processus).
+    """
+    cell_points = points[indices]
+
+    # Si trop de points, sous-échantillonner pour DBSCAN
+    if len(cell_points) > max_points_per_cluster:
+        cell_points_sample, _ = _downsample_points(cell_points, max_points_per_cluster)
+    else:
+        cell_points_sample = cell_points
+
+    if HAS_SCIPY:
+        # Voisinages par cKDTree, DBSCAN sur le graphe précalculé
+        labels = _dbscan_radius_graph(cell_points_sample, eps, min_points)
+    else:
+        # DBSCAN avec sklearn (plus efficace en mémoire)
+        clustering = DBSCAN(
+            eps=eps,
+            min_samples=min_points,
+            algorithm='ball_tree',  # Plus efficace que brute force
+            n_jobs=1  # Le parallélisme se fait entre cellules
+        )
+        labels = clustering.fit_predict(cell_points_sample)
+
+    # Extraire les clusters de cette cellule
+    cluster_labels = [label for label in np.unique(labels) if label != -1]  # -1 = bruit
+    downsampled = len(cell_points) > max_points_per_cluster
+
+    if downsampled and HAS_SCIPY and cluster_labels:
+        # Étendre les clusters aux points proches non échantillonnés :
+        # un seul kd-tree sur la cellule, une requête groupée pour tous les centres
+        centers = np.array([
+            cell_points_sample[labels == label].mean(axis=0, dtype=np.float64)
+            for label in cluster_labels
+        ])
+        full_tree = cKDTree(cell_points, balanced_tree=False, compact_nodes=False)
+        neighbors = full_tree.query_ball_point(centers, r=eps * 2, workers=workers, return_sorted=False)
+        extended = [cell_points[np.asarray(idx, dtype=np.int64)] for idx in neighbors]
+    else:
+        extended = None
+
+    clusters = []
+    for k, label in enumerate(cluster_labels):
+        cluster_mask = labels == label
+
+        # Récupérer les points originaux du cluster
+        if extended is not None:
+            cluster_points = extended[k]
+        elif downsampled:
+            # Étendre le cluster aux points proches non échantillonnés
+            cluster_center = cell_points_sample[cluster_mask].mean(axis=0, dtype=np.float64)
+            distances = np.linalg.norm(cell_points - cluster_center, axis=1)
+            extended_mask = distances < (eps * 2)
+            cluster_points = cell_points[extended_mask]
+        else:
+            cluster_points = cell_points_sample[cluster_mask]
+
+        if len(cluster_points) >= min_points:
+            clusters.append(cluster_points)
+
+    return clusters
+
+
+# Processeur du worker (installé une fois par processus par l'initializer du pool)
+_worker_processor = None
+
+
+def _init_building_worker(processor):
+    """Initializer du pool : reçoit une copie du processeur (paramètres, dossiers)"""
+    global _worker_processor
+    _worker_processor = processor
+
+
+def _process_building_shared(shm_name: str, shape: Tuple[int, int],
+                             start: int, end: int,
+                             building_id: str, origin: np.ndarray):
+    """Traite un bâtiment dans un worker, points lus en mémoire partagée
+
+    Le GLB est écrit par le worker ; seules les métadonnées reviennent au parent.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    all_points = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+    bldg_points = np.array(all_points[start:end])
+    del all_points
+    shm.close()
+
+    result = _worker_processor.process_building(building_id, bldg_points, origin)
+    return None if result is None else result[0]
+
 
 @dataclass
 class CourtyardInfo:
@@ -70,6 +391,21 @@ class BuildingMetadata:
     num_courtyards: int = 0
 
 
+# Table des métadonnées (une ligne par bâtiment, colonnes typées).
+# Coordonnées en float64 : en Lambert-93, un float32 absolu n'a qu'une précision de ~0.5 m.
+METADATA_DTYPE = np.dtype([
+    ('id', 'U16'),
+    ('num_points', 'i4'),
+    ('num_planes', 'i4'),
+    ('bbox_min', '3f8'),
+    ('bbox_max', '3f8'),
+    ('center', '3f8'),
+    ('area_m2', 'f4'),
+    ('height_m', 'f4'),
+    ('num_courtyards', 'i4'),
+])
+
+
 class OptimizedBuildingProcessor:
     """
     Processeur optimisé pour éviter la saturation RAM
@@ -82,11 +418,17 @@ class OptimizedBuildingProcessor:
                  dbscan_eps: float = 8.5,
                  dbscan_min_points: int = 100,
                  grid_size: float = 100.0,  # Taille de grille pour découpage spatial
-                 max_points_per_cluster: int = 50000):  # Limite pour sous-échantillonnage
+                 max_points_per_cluster: int = 50000,  # Limite pour sous-échantillonnage
+                 n_jobs: int = -1,  # Processus pour le DBSCAN par cellule
+                 max_workers: Optional[int] = None,  # Processus pour le maillage des bâtiments
+                 use_cache: bool = True):  # Cache .npy des points bâtiments
         """
         Args:
             grid_size: Taille de la grille en mètres pour découpage spatial
             max_points_per_cluster: Si un cluster dépasse ce nombre, on sous-échantillonne
+            n_jobs: Nombre de processus joblib pour le clustering des cellules (-1 = tous les cœurs)
+            max_workers: Nombre de processus pour traiter les bâtiments (None = tous les cœurs, 1 = séquentiel)
+            use_cache: Réutiliser les points bâtiments déjà extraits d'une tuile inchangée
         """
         project_root = Path(__file__).parent.parent
 
@@ -105,11 +447,37 @@ class OptimizedBuildingProcessor:
         self.dbscan_min_points = dbscan_min_points
         self.grid_size = grid_size
         self.max_points_per_cluster = max_points_per_cluster
+        self.n_jobs = n_jobs
+        self.max_workers = max_workers
+        self.use_cache = use_cache
+        
+        # Normales du dernier bâtiment maillé (réutilisées pour compter les plans)
+        self._mesh_normals = None
 
         self.buildings_dir = self.output_dir / "buildings"
         self.buildings_dir.mkdir(parents=True, exist_ok=True)
 
-        self.metadata = []
+        # Métadonnées en tableau structuré, agrandi par doublement
+        self._metadata_arr = np.empty(256, dtype=METADATA_DTYPE)
+        self._n_metadata = 0
+
+    @property
+    def metadata(self) -> np.ndarray:
+        """Métadonnées des bâtiments traités (vue sur le tableau structuré)"""
+        return self._metadata_arr[:self._n_metadata]
+
+    def _append_metadata(self, m: BuildingMetadata):
+        """Ajoute une ligne à la table des métadonnées"""
+        if self._n_metadata == len(self._metadata_arr):
+            grown = np.empty(2 * len(self._metadata_arr), dtype=METADATA_DTYPE)
+            grown[:self._n_metadata] = self._metadata_arr
+            self._metadata_arr = grown
+        self._metadata_arr[self._n_metadata] = (
+            m.id, m.num_points, m.num_planes,
+            m.bbox_min, m.bbox_max, m.center,
+            m.area_m2, m.height_m, m.num_courtyards
+        )
+        self._n_metadata += 1
 
     # ==================== OPTIMISATION MÉMOIRE ====================
 
@@ -122,50 +490,80 @@ class OptimizedBuildingProcessor:
         logger.info(f"Découpage spatial (grille {self.grid_size}m)...")
         
         # Calculer les indices de grille pour chaque point
-        grid_x = np.floor(points[:, 0] / self.grid_size).astype(int)
-        grid_y = np.floor(points[:, 1] / self.grid_size).astype(int)
+        grid_x = np.floor(points[:, 0] / self.grid_size).astype(np.int32)
+        grid_y = np.floor(points[:, 1] / self.grid_size).astype(np.int32)
         
-        # Grouper les points par cellule de grille
-        grid_cells = {}
-        unique_cells = np.unique(np.column_stack([grid_x, grid_y]), axis=0)
+        # Clé unique par cellule (gx sur 32 bits de poids fort, gy sur 32 bits de poids faible)
+        key = (grid_x.astype(np.int64) << 32) | (grid_y.astype(np.int64) & 0xFFFFFFFF)
         
-        for cell in unique_cells:
-            cx, cy = cell
-            mask = (grid_x == cx) & (grid_y == cy)
-            indices = np.where(mask)[0]
-            if len(indices) > 0:
-                grid_cells[(cx, cy)] = indices
+        # Un seul tri : les points d'une même cellule deviennent contigus
+        order = np.argsort(key, kind='stable')
+        _, starts = np.unique(key[order], return_index=True)
+        ends = np.r_[starts[1:], len(key)]
+        
+        # Grouper les points par cellule de grille (tranches de `order`, sans copie)
+        grid_cells = {}
+        for start, end in zip(starts, ends):
+            first = order[start]
+            grid_cells[(int(grid_x[first]), int(grid_y[first]))] = order[start:end]
         
         logger.info(f" {len(grid_cells)} cellules de grille créées")
         return grid_cells
 
-    def merge_adjacent_clusters(self, 
-                                clusters: List[np.ndarray],
+    def merge_adjacent_clusters(self,
+                                points_flat: np.ndarray,
+                                labels_flat: np.ndarray,
                                 eps: float) -> List[np.ndarray]:
         """
         Fusionne les clusters adjacents provenant de différentes cellules de grille
+        
+        Les clusters sont donnés à plat : un tableau (N, 3) de points et l'étiquette
+        de cluster (int32) de chaque point. Retourne un tableau par bâtiment, vues
+        d'un unique tableau trié (pas de vstack par bâtiment).
         """
-        if len(clusters) <= 1:
-            return clusters
+        counts = np.bincount(labels_flat)
+        n_clusters = len(counts)
+        if n_clusters <= 1:
+            return [points_flat] if n_clusters == 1 else []
         
         logger.info(f"Fusion des clusters adjacents...")
         
-        # Calculer les centres de chaque cluster
-        centers = np.array([c.mean(axis=0) for c in clusters])
+        # Calculer les centres de chaque cluster (sommes par tranche d'étiquette)
+        if np.all(labels_flat[:-1] <= labels_flat[1:]):
+            sorted_pts = points_flat
+        else:
+            sorted_pts = points_flat[np.argsort(labels_flat, kind='stable')]
+        starts = np.r_[0, np.cumsum(counts[:-1])]
+        centers = np.add.reduceat(sorted_pts, starts, axis=0, dtype=np.float64) / counts[:, None]
+        del sorted_pts
         
-        # Clustering des centres avec DBSCAN
-        from sklearn.cluster import DBSCAN
-        clustering = DBSCAN(eps=eps * 2, min_samples=1, algorithm='ball_tree')
-        labels = clustering.fit_predict(centers)
+        # Regroupement des centres à moins de 2*eps : composantes connexes du
+        # graphe de proximité (équivalent à DBSCAN avec min_samples=1)
+        if HAS_SCIPY:
+            # query_pairs n'est pas multithread : voisinages de tous les centres
+            # en une requête query_ball_point sur tous les cœurs, puis graphe CSR
+            tree = cKDTree(centers, balanced_tree=False, compact_nodes=False)
+            neighbors = tree.query_ball_point(centers, r=eps * 2, workers=-1, return_sorted=False)
+            lengths = np.fromiter((len(nb) for nb in neighbors), dtype=np.int64, count=n_clusters)
+            indptr = np.r_[0, np.cumsum(lengths)]
+            indices = np.fromiter((j for nb in neighbors for j in nb), dtype=np.int64, count=int(indptr[-1]))
+            graph = csr_matrix(
+                (np.ones(len(indices), dtype=np.int8), indices, indptr),
+                shape=(n_clusters, n_clusters)
+            )
+            _, merge_labels = connected_components(graph, directed=False)
+        else:
+            clustering = DBSCAN(eps=eps * 2, min_samples=1, algorithm='ball_tree')
+            merge_labels = clustering.fit_predict(centers)
         
-        # Fusionner les clusters avec le même label
-        merged = []
-        for label in np.unique(labels):
-            cluster_indices = np.where(labels == label)[0]
-            merged_points = np.vstack([clusters[i] for i in cluster_indices])
-            merged.append(merged_points)
+        # Fusionner les clusters avec le même label : une étiquette par point,
+        # un seul tri, puis découpage en vues
+        new_labels = merge_labels[labels_flat]
+        order = np.argsort(new_labels, kind='stable')
+        merged_counts = np.bincount(new_labels)
+        merged = np.split(points_flat[order], np.cumsum(merged_counts[:-1]))
         
-        logger.info(f" {len(clusters)} → {len(merged)} clusters après fusion")
+        logger.info(f" {n_clusters} → {len(merged)} clusters après fusion")
         return merged
 
     def downsample_points(self, points: np.ndarray, 
@@ -175,27 +573,7 @@ class OptimizedBuildingProcessor:
         
         Retourne: (points_downsampled, indices_originaux)
         """
-        if len(points) <= target_size:
-            return points, np.arange(len(points))
-        
-        # Voxel downsampling
-        pcd = o3d.geometry.PointCloud()
-        pcd.points = o3d.utility.Vector3dVector(points)
-        
-        # Calculer la taille de voxel appropriée
-        bbox = pcd.get_axis_aligned_bounding_box()
-        diagonal = np.linalg.norm(bbox.get_max_bound() - bbox.get_min_bound())
-        voxel_size = diagonal / np.cbrt(target_size)
-        
-        pcd_down = pcd.voxel_down_sample(voxel_size)
-        downsampled = np.asarray(pcd_down.points)
-        
-        # Trouver les indices les plus proches dans le nuage original
-        from scipy.spatial import cKDTree
-        tree = cKDTree(points)
-        _, indices = tree.query(downsampled)
-        
-        return downsampled, indices
+        return _downsample_points(points, target_size)
 
     # ==================== SEGMENTATION OPTIMISÉE ====================
 
@@ -220,72 +598,42 @@ class OptimizedBuildingProcessor:
         all_clusters = []
         total_cells = len(grid_cells)
         
-        # Traiter chaque cellule avec barre de progression
-        logger.info("Clustering par cellule:")
+        # Cellules indépendantes : DBSCAN en parallèle (un processus par cœur).
+        # Le nuage complet est partagé par memmap (max_nbytes), pas copié par cellule.
+        # En séquentiel (n_jobs=1), les requêtes kd-tree utilisent tous les cœurs
+        logger.info(f"Clustering par cellule ({self.n_jobs} jobs):")
+        tree_workers = -1 if self.n_jobs == 1 else 1
+        results = Parallel(n_jobs=self.n_jobs, backend='loky', batch_size='auto',
+                           max_nbytes='1M', return_as='generator')(
+            delayed(_cluster_one_cell)(points, indices, eps, min_points,
+                                       self.max_points_per_cluster, tree_workers)
+            for indices in grid_cells.values()
+        )
+        
         with tqdm(total=total_cells, desc="Cellules", unit="cell") as pbar:
-            for (cx, cy), indices in grid_cells.items():
-                cell_points = points[indices]
-                
-                # Si trop de points, sous-échantillonner pour DBSCAN
-                if len(cell_points) > self.max_points_per_cluster:
-                    logger.debug(f" Cellule ({cx},{cy}): {len(cell_points)} points → sous-échantillonnage")
-                    cell_points_sample, sample_indices = self.downsample_points(
-                        cell_points, 
-                        self.max_points_per_cluster
-                    )
-                    # Mapper les indices
-                    original_indices = indices[sample_indices]
-                else:
-                    cell_points_sample = cell_points
-                    original_indices = indices
-                
-                # DBSCAN avec sklearn (plus efficace en mémoire)
-                clustering = DBSCAN(
-                    eps=eps,
-                    min_samples=min_points,
-                    algorithm='ball_tree',  # Plus efficace que brute force
-                    n_jobs=1  # Éviter les problèmes de mémoire avec parallel
-                )
-                labels = clustering.fit_predict(cell_points_sample)
-                
-                # Extraire les clusters de cette cellule
-                for label in np.unique(labels):
-                    if label == -1:  # Bruit
-                        continue
-                    cluster_mask = labels == label
-                    
-                    # Récupérer les points originaux du cluster
-                    if len(cell_points) > self.max_points_per_cluster:
-                        # Étendre le cluster aux points proches non échantillonnés
-                        cluster_center = cell_points_sample[cluster_mask].mean(axis=0)
-                        distances = np.linalg.norm(cell_points - cluster_center, axis=1)
-                        extended_mask = distances < (eps * 2)
-                        cluster_points = cell_points[extended_mask]
-                    else:
-                        cluster_points = cell_points_sample[cluster_mask]
-                    
-                    if len(cluster_points) >= min_points:
-                        all_clusters.append(cluster_points)
-                
+            for cell_clusters in results:
+                all_clusters.extend(cell_clusters)
                 pbar.update(1)
-                
-                # Libérer la mémoire
-                del cell_points, cell_points_sample
-                if (pbar.n % 10) == 0:
-                    gc.collect()
         
         logger.info(f"Clusters avant fusion: {len(all_clusters)}")
         
         # Fusionner les clusters adjacents entre cellules
         if len(all_clusters) > 0:
-            buildings = self.merge_adjacent_clusters(all_clusters, eps)
+            # Disposition à plat : un tableau de points + une étiquette par point
+            cluster_sizes = [len(c) for c in all_clusters]
+            points_flat = np.concatenate(all_clusters)
+            del all_clusters
+            labels_flat = np.repeat(np.arange(len(cluster_sizes), dtype=np.int32), cluster_sizes)
+            
+            buildings = self.merge_adjacent_clusters(points_flat, labels_flat, eps)
+            del points_flat, labels_flat
         else:
             buildings = []
         
         logger.info(f"Bâtiments finaux détectés: {len(buildings)}")
         
         # Libérer la mémoire
-        del all_clusters, grid_cells
+        del grid_cells
         gc.collect()
         
         return buildings
@@ -304,30 +652,93 @@ class OptimizedBuildingProcessor:
             logger.info(f" - {f.name}")
         return laz_files
 
-    def load_point_cloud(self, filepath: Path) -> Tuple[np.ndarray, np.ndarray]:
-        """Charge un fichier LAZ et retourne points + classifications"""
-        logger.info(f"Chargement: {filepath.name}")
-        las = laspy.read(str(filepath))
-
-        points = np.vstack((las.x, las.y, las.z)).transpose()
+    def _cache_path(self, filepath: Path) -> Path:
+        """Fichier de cache des points bâtiments d'une tuile
 
-        if hasattr(las, 'classification'):
-            classifications = np.array(las.classification)
-        else:
-            classifications = np.zeros(len(points), dtype=np.uint8)
-
-        logger.info(f" Points: {len(points):,}")
-        logger.info(f" Classes: {np.unique(classifications)}")
-
-        return points, classifications
-
-    def extract_buildings(self, points: np.ndarray,
-                         classifications: np.ndarray) -> np.ndarray:
-        """Extrait les points classifiés comme 'Bâtiment' (classe 6 LAS)"""
-        building_mask = classifications == 6
-        building_points = points[building_mask]
+        Clé : chemin résolu, date de modification et taille, comme le cache
+        de LidarTileAnalyzer : deux tuiles de même nom dans des dossiers
+        différents ne partagent pas d'entrée, et toute modification l'invalide.
+        """
+        stat = filepath.stat()
+        key = f"{filepath.resolve()}|{stat.st_mtime_ns}|{stat.st_size}"
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        return CACHE_DIR / f"{filepath.name}.{digest}.buildings.npy"
+
+    def load_point_cloud(self, filepath: Path,
+                         chunk_size: int = 1_000_000) -> Tuple[np.ndarray, np.ndarray]:
+        """Charge les points 'Bâtiment' (classe 6 LAS) d'un fichier LAZ
+        
+        Lecture par blocs (chunk_iterator) avec filtrage de classe à la volée :
+        les points hors bâtiments ne sont jamais conservés en mémoire.
+        
+        Les points sont en float32, relatifs à l'origine de la tuile : en Lambert-93,
+        un float32 absolu n'a qu'une précision de ~0.5 m en Y, contre le mm en relatif.
+        
+        Les points extraits sont mis en cache (.npy) : pour une tuile inchangée, ils
+        sont relus en memmap, sans décompression LAZ.
+        
+        Retourne: (points_float32, origine_float64)
+        """
+        logger.info(f"Chargement: {filepath.name}")
+        
+        cache_file = self._cache_path(filepath)
+        if self.use_cache and cache_file.exists():
+            try:
+                building_points = np.load(cache_file, mmap_mode='r')
+            except (OSError, ValueError) as e:
+                logger.warning(f"Cache illisible ({e}), relecture du LAZ")
+            else:
+                # L'origine vient de l'en-tête (quelques Ko)
+                with laspy.open(str(filepath)) as f:
+                    mins = f.header.mins
+                origin = np.array([np.floor(mins[0]), np.floor(mins[1]), 0.0])
+                logger.info(f" Bâtiments (cache): {len(building_points):,} points")
+                return building_points, origin
+        
+        kept = []
+        with laspy.open(str(filepath)) as f:
+            n_total = f.header.point_count
+            mins = f.header.mins
+            origin = np.array([np.floor(mins[0]), np.floor(mins[1]), 0.0])
+            
+            for chunk in f.chunk_iterator(chunk_size):
+                mask = np.asarray(chunk.classification) == 6
+                n = int(np.count_nonzero(mask))
+                if n == 0:
+                    continue
+                xyz = np.empty((n, 3), dtype=np.float32)
+                xyz[:, 0] = np.asarray(chunk.x)[mask] - origin[0]
+                xyz[:, 1] = np.asarray(chunk.y)[mask] - origin[1]
+                xyz[:, 2] = np.asarray(chunk.z)[mask]
+                kept.append(xyz)
+        
+        # Pic mémoire : un bloc + les points bâtiments retenus
+        building_points = np.concatenate(kept) if kept else np.empty((0, 3), dtype=np.float32)
+        del kept
+        
+        logger.info(f" Points: {n_total:,}")
         logger.info(f" Bâtiments: {len(building_points):,} points")
-        return building_points
+        
+        if self.use_cache:
+            # Écriture dans un fichier temporaire puis renommage atomique : une
+            # interruption ne laisse jamais de .npy tronqué sous une clé valide
+            tmp_path = None
+            try:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                with tempfile.NamedTemporaryFile(dir=cache_file.parent, suffix='.npy.tmp',
+                                                 delete=False) as tmp:
+                    tmp_path = tmp.name
+                    np.save(tmp, building_points)
+                os.replace(tmp_path, cache_file)
+            except OSError as e:
+                logger.warning(f"Impossible d'écrire le cache: {e}")
+                if tmp_path is not None:
+                    try:
+                        os.remove(tmp_path)
+                    except OSError:
+                        pass
+        
+        return building_points, origin
 
     # ==================== DÉTECTION DE COURS (simplifié) ====================
 
@@ -338,14 +749,13 @@ class OptimizedBuildingProcessor:
         points_2d = points[:, :2]
 
         # Pour éviter les problèmes de mémoire, limiter le nombre de points
-        if len(points_2d) > 10000:
-            indices = np.random.choice(len(points_2d), 10000, replace=False)
-            points_2d_sample = points_2d[indices]
-        else:
-            points_2d_sample = points_2d
+        # (pas régulier : ni permutation de taille N, ni tirage aléatoire ;
+        # copie contiguë pour la triangulation)
+        stride = max(1, len(points_2d) // 10000)
+        points_2d_sample = np.ascontiguousarray(points_2d[::stride])
 
         try:
-            alpha_shape_2d = alphashape.alphashape(points_2d_sample, alpha)
+            alpha_shape_2d = _alpha_shape_2d(points_2d_sample, alpha)
         except Exception as e:
             logger.warning(f"Alpha shape échoué: {e}")
             if HAS_SCIPY:
@@ -369,7 +779,11 @@ class OptimizedBuildingProcessor:
                            holes_2d: List[np.ndarray]) -> List[CourtyardInfo]:
         """Validation simplifiée des cours"""
         courtyards = []
+        if not holes_2d:
+            return courtyards
         
+        # Filtrer les trous candidats
+        candidates = []
         for hole in holes_2d:
             if len(hole) < 4:
                 continue
@@ -380,17 +794,31 @@ class OptimizedBuildingProcessor:
             if area < 10 or area > 2000:  # Filtres de taille
                 continue
             
-            # Hauteur moyenne des points dans le trou
-            hole_poly_buffered = poly.buffer(0.5)
-            mask = [hole_poly_buffered.contains(Point(p[:2])) for p in points[:min(len(points), 1000)]]
+            candidates.append((hole, area, poly.buffer(0.5)))
+        
+        if not candidates:
+            return courtyards
+        
+        # Bornes Z calculées une seule fois pour toutes les cours
+        pts_min_z = float(points[:, 2].min())
+        pts_max_z = float(points[:, 2].max())
+        
+        xs = points[:, 0]
+        ys = points[:, 1]
+        
+        for hole, area, buffered in candidates:
+            # Hauteur moyenne des points dans le trou : filtre par boîte englobante
+            # (numpy), puis test exact contains_xy sur les seuls points retenus
+            minx, miny, maxx, maxy = buffered.bounds
+            in_box = np.flatnonzero((xs > minx) & (xs < maxx) & (ys > miny) & (ys < maxy))
+            shapely.prepare(buffered)
+            inside = in_box[shapely.contains_xy(buffered, xs[in_box], ys[in_box])]
             
-            if any(mask):
-                points_in_hole = points[mask]
-                height_m = float(points_in_hole[:, 2].mean())
-                wall_height = float(points[:, 2].max() - height_m)
+            if len(inside) > 0:
+                height_m = float(points[inside, 2].mean(dtype=np.float64))
             else:
-                height_m = float(points[:, 2].min())
-                wall_height = float(points[:, 2].max() - height_m)
+                height_m = pts_min_z
+            wall_height = float(pts_max_z - height_m)
             
             courtyards.append(CourtyardInfo(
                 boundary_2d=hole,
@@ -404,7 +832,7 @@ class OptimizedBuildingProcessor:
     def extract_planes_ransac(self, points: np.ndarray) -> List[Dict]:
         """Extraction de plans avec RANSAC (version allégée)"""
         pcd = o3d.geometry.PointCloud()
-        pcd.points = o3d.utility.Vector3dVector(points)
+        pcd.points = o3d.utility.Vector3dVector(np.asarray(points, dtype=np.float64))
         
         planes = []
         max_iterations = 5
@@ -437,8 +865,52 @@ class OptimizedBuildingProcessor:
         
         return planes
 
+    def estimate_planes_from_normals(self, normals: np.ndarray,
+                                     min_fraction: float = 0.02) -> List[Dict]:
+        """Compte les directions de plans dominantes par histogramme des normales
+        
+        Remplace le RANSAC itératif quand seul le nombre de plans est utile :
+        un histogramme azimut/élévation (bins de 10°) des normales déjà estimées
+        pour le maillage ; un bin regroupant plus de `min_fraction` des normales
+        est un plan. Les normales quasi verticales (toits plats) forment un seul
+        groupe, l'azimut n'y ayant pas de sens.
+        """
+        if len(normals) == 0:
+            return []
+        
+        min_count = len(normals) * min_fraction
+        planes = []
+        
+        horizontal = np.abs(normals[:, 2]) > 0.95
+        for sign in (1.0, -1.0):
+            n_flat = int(np.count_nonzero(horizontal & (np.sign(normals[:, 2]) == sign)))
+            if n_flat > min_count:
+                planes.append({'normal': [0.0, 0.0, sign], 'num_points': n_flat})
+        
+        others = normals[~horizontal]
+        azimuth = np.arctan2(others[:, 1], others[:, 0])
+        elevation = np.arcsin(np.clip(others[:, 2], -1.0, 1.0))
+        hist, az_edges, el_edges = np.histogram2d(
+            azimuth, elevation, bins=[36, 18],
+            range=[[-np.pi, np.pi], [-np.pi / 2, np.pi / 2]]
+        )
+        
+        for i, j in zip(*np.nonzero(hist > min_count)):
+            az = 0.5 * (az_edges[i] + az_edges[i + 1])
+            el = 0.5 * (el_edges[j] + el_edges[j + 1])
+            planes.append({
+                'normal': [float(np.cos(el) * np.cos(az)), float(np.cos(el) * np.sin(az)), float(np.sin(el))],
+                'num_points': int(hist[i, j])
+            })
+        
+        return planes
+
     def create_building_mesh_with_courtyards(self, points: np.ndarray) -> o3d.geometry.TriangleMesh:
         """Création de mesh simplifiée"""
+        self._mesh_normals = None
+        # Open3D (legacy) travaille en float64
+        points = np.asarray(points, dtype=np.float64)
+        
         # Sous-échantillonner si trop de points
         if len(points) > 20000:
             pcd = o3d.geometry.PointCloud()
@@ -450,11 +922,35 @@ class OptimizedBuildingProcessor:
         pcd.points = o3d.utility.Vector3dVector(points)
         
         try:
-            pcd.estimate_normals(
-                search_param=o3d.geometry.KDTreeSearchParamHybrid(radius=1.0, max_nn=30)
-            )
-            pcd.orient_normals_consistent_tangent_plane(30)
+            normals_done = False
+            if HAS_CUDA:
+                # Normales sur GPU (API tenseur) ; en cas d'échec (mémoire GPU,
+                # contexte CUDA hérité d'un fork...), repli sur le CPU
+                try:
+                    pcd_t = o3d.t.geometry.PointCloud.from_legacy(pcd).cuda()
+                    pcd_t.estimate_normals(max_nn=30, radius=1.0)
+                    pcd = pcd_t.cpu().to_legacy()
+                    normals_done = True
+                except Exception as e:
+                    logger.warning(f"Normales GPU échouées: {e}, utilisation du CPU")
+            if not normals_done:
+                pcd.estimate_normals(
+                    search_param=o3d.geometry.KDTreeSearchParamHybrid(radius=1.0, max_nn=30)
+                )
+            
+            # Orientation radiale : normales tournées vers l'extérieur depuis le centre
+            # de l'emprise au pied du bâtiment (enveloppe ~étoilée), en O(n) vectorisé
+            # au lieu de l'arbre couvrant de orient_normals_consistent_tangent_plane
+            pts = np.asarray(pcd.points)
+            normals = np.asarray(pcd.normals)
+            center = pts.mean(axis=0)
+            center[2] = pts[:, 2].min()
+            flip = np.einsum('ij,ij->i', normals, pts - center) < 0
+            normals[flip] *= -1
+            pcd.normals = o3d.utility.Vector3dVector(normals)
+            self._mesh_normals = normals
             
+            # Poisson : pas d'équivalent tenseur dans Open3D, reste sur le CPU
             mesh, densities = o3d.geometry.TriangleMesh.create_from_point_cloud_poisson(
                 pcd, depth=8, width=0, scale=1.1, linear_fit=False
             )
@@ -482,19 +978,31 @@ class OptimizedBuildingProcessor:
                                  building_id: str,
                                  points: np.ndarray,
                                  planes: List[Dict],
-                                 num_courtyards: int = 0) -> BuildingMetadata:
-        """Calcule les métadonnées"""
-        bbox_min = points.min(axis=0).tolist()
-        bbox_max = points.max(axis=0).tolist()
-        center = points.mean(axis=0).tolist()
-
-        footprint_points = points[points[:, 2] < np.percentile(points[:, 2], 20)]
-        if len(footprint_points) > 0:
-            x_range = footprint_points[:, 0].max() - footprint_points[:, 0].min()
-            y_range = footprint_points[:, 1].max() - footprint_points[:, 1].min()
+                                 num_courtyards: int = 0,
+                                 origin: Optional[np.ndarray] = None) -> BuildingMetadata:
+        """Calcule les métadonnées (coordonnées absolues si `origin` est fourni)"""
+        if origin is None:
+            origin = np.zeros(3)
+
+        if HAS_NUMBA:
+            # Boîte, moyenne, p20 de Z et emprise en passes compilées
+            mins, maxs, mean, _, x_range, y_range = _building_stats(points, 20.0, 4096)
+            bbox_min = (mins + origin).tolist()
+            bbox_max = (maxs + origin).tolist()
+            center = (mean + origin).tolist()
             area_m2 = float(x_range * y_range)
         else:
-            area_m2 = 0.0
+            bbox_min = (points.min(axis=0) + origin).tolist()
+            bbox_max = (points.max(axis=0) + origin).tolist()
+            center = (points.mean(axis=0, dtype=np.float64) + origin).tolist()
+
+            footprint_points = points[points[:, 2] < np.percentile(points[:, 2], 20)]
+            if len(footprint_points) > 0:
+                x_range = footprint_points[:, 0].max() - footprint_points[:, 0].min()
+                y_range = footprint_points[:, 1].max() - footprint_points[:, 1].min()
+                area_m2 = float(x_range * y_range)
+            else:
+                area_m2 = 0.0
 
         height_m = float(bbox_max[2] - bbox_min[2])
 
@@ -539,94 +1047,198 @@ class OptimizedBuildingProcessor:
         all_buildings = []
         building_counter = 0
 
-        for laz_file in laz_files:
-            logger.info(f"\n{'='*70}")
-            logger.info(f"Fichier: {laz_file.name}")
-            logger.info(f"{'='*70}")
+        # Les bâtiments sont indépendants : un pool de processus (Poisson, RANSAC...)
+        max_workers = self.max_workers or os.cpu_count() or 1
+        pool = None
+        if max_workers > 1:
+            pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_building_worker,
+                initargs=(self,)
+            )
 
-            # Charger
-            points, classifications = self.load_point_cloud(laz_file)
+        try:
+            for laz_file in laz_files:
+                logger.info(f"\n{'='*70}")
+                logger.info(f"Fichier: {laz_file.name}")
+                logger.info(f"{'='*70}")
+
+                # Charger (points bâtiments uniquement)
+                building_points, origin = self.load_point_cloud(laz_file)
+                if len(building_points) == 0:
+                    logger.warning(" Aucun point de bâtiment trouvé")
+                    continue
 
-            # Extraire bâtiments
-            building_points = self.extract_buildings(points, classifications)
-            if len(building_points) == 0:
-                logger.warning(" Aucun point de bâtiment trouvé")
-                continue
+                # Segmentation optimisée
+                buildings = self.segment_buildings_optimized(building_points)
+                del building_points
 
-            # Libérer mémoire
-            del points, classifications
-            gc.collect()
+                building_ids = []
+                for _ in buildings:
+                    building_counter += 1
+                    building_ids.append(f"building_{building_counter:04d}")
 
-            # Segmentation optimisée
-            buildings = self.segment_buildings_optimized(building_points)
+                if pool is not None:
+                    self._process_buildings_parallel(pool, building_ids, buildings, origin)
+                    continue
 
-            # Traiter chaque bâtiment
-            for i, bldg_points in enumerate(buildings):
-                building_counter += 1
-                building_id = f"building_{building_counter:04d}"
+                # Traiter chaque bâtiment (séquentiel)
+                for building_id, bldg_points in zip(building_ids, buildings):
+                    result = self.process_building(building_id, bldg_points, origin)
+                    if result is not None:
+                        metadata, mesh = result
+                        self._append_metadata(metadata)
+                        all_buildings.append(mesh)
+
+                    # Libérer mémoire régulièrement
+                    if self._n_metadata % 10 == 0:
+                        gc.collect()
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        # En parallèle, les meshes sont restés dans les workers : relire les GLB
+        if pool is not None:
+            all_buildings = [
+                o3d.io.read_triangle_mesh(str(self.buildings_dir / f"{building_id}.glb"))
+                for building_id in self.metadata['id']
+            ]
 
-                logger.info(f"\n {building_id}: {len(bldg_points):,} points")
+        # Résumé
+        logger.info(f"\n{'='*70}")
+        logger.info(f"RÉSUMÉ")
+        logger.info(f"{'='*70}")
+        logger.info(f"Bâtiments traités: {building_counter}")
+        logger.info(f"Cours détectées: {int(self.metadata['num_courtyards'].sum())}")
 
-                try:
-                    exterior_2d, holes_2d = self.detect_courtyard_2d(bldg_points, alpha=0.8)
-                    courtyards = self.validate_courtyards(bldg_points, holes_2d)
-                    planes = self.extract_planes_ransac(bldg_points)
+        if all_buildings:
+            self._create_merged_model(all_buildings)
 
-                    logger.info(f"  → {len(courtyards)} cours validées")
+        self._save_metadata()
 
-                    mesh = self.create_building_mesh_with_courtyards(bldg_points)
+    def process_building(self, building_id: str,
+                         bldg_points: np.ndarray,
+                         origin: np.ndarray) -> Optional[Tuple[BuildingMetadata, o3d.geometry.TriangleMesh]]:
+        """Traite un bâtiment : cours, plans, mesh, métadonnées et export GLB
+        
+        Retourne (metadata, mesh), ou None en cas d'échec
+        """
+        logger.info(f"\n {building_id}: {len(bldg_points):,} points")
 
-                    logger.info(f"  → Mesh: {len(mesh.vertices):,} V, {len(mesh.triangles):,} T")
+        try:
+            exterior_2d, holes_2d = self.detect_courtyard_2d(bldg_points, alpha=0.8)
+            courtyards = self.validate_courtyards(bldg_points, holes_2d)
 
-                    metadata = self.compute_building_metadata(
-                        building_id,
-                        bldg_points,
-                        planes,
-                        num_courtyards=len(courtyards)
-                    )
-                    self.metadata.append(metadata)
+            logger.info(f"  → {len(courtyards)} cours validées")
 
-                    output_path = self.buildings_dir / f"{building_id}.glb"
-                    self.export_to_glb(mesh, output_path)
+            mesh = self.create_building_mesh_with_courtyards(bldg_points)
 
-                    all_buildings.append(mesh)
+            logger.info(f"  → Mesh: {len(mesh.vertices):,} V, {len(mesh.triangles):,} T")
 
-                except Exception as e:
-                    logger.error(f"  ✗ Erreur: {e}")
-                    continue
+            # Plans dominants à partir des normales du maillage (sans RANSAC)
+            if self._mesh_normals is not None:
+                planes = self.estimate_planes_from_normals(self._mesh_normals)
+            else:
+                planes = self.extract_planes_ransac(bldg_points)
+
+            metadata = self.compute_building_metadata(
+                building_id,
+                bldg_points,
+                planes,
+                num_courtyards=len(courtyards),
+                origin=origin
+            )
 
-                # Libérer mémoire régulièrement
-                if building_counter % 10 == 0:
-                    gc.collect()
+            # Retour en coordonnées absolues pour l'export
+            mesh.translate(origin)
 
-        # Résumé
-        logger.info(f"\n{'='*70}")
-        logger.info(f"RÉSUMÉ")
-        logger.info(f"{'='*70}")
-        logger.info(f"Bâtiments traités: {building_counter}")
-        logger.info(f"Cours détectées: {sum(m.num_courtyards for m in self.metadata)}")
+            output_path = self.buildings_dir / f"{building_id}.glb"
+            self.export_to_glb(mesh, output_path)
 
-        if all_buildings:
-            self._create_merged_model(all_buildings)
+            return metadata, mesh
 
-        self._save_metadata()
+        except Exception as e:
+            logger.error(f"  ✗ Erreur: {e}")
+            return None
+
+    def _process_buildings_parallel(self, pool: ProcessPoolExecutor,
+                                    building_ids: List[str],
+                                    buildings: List[np.ndarray],
+                                    origin: np.ndarray):
+        """Répartit les bâtiments d'une tuile sur le pool de processus
+        
+        Les points sont copiés une fois dans un bloc de mémoire partagée ; chaque
+        tâche ne transmet que ses bornes (pas de sérialisation des points).
+        """
+        sizes = np.array([len(b) for b in buildings], dtype=np.int64)
+        if sizes.sum() == 0:
+            return
+        offsets = np.r_[0, np.cumsum(sizes)]
+        shape = (int(offsets[-1]), 3)
+
+        shm = shared_memory.SharedMemory(create=True, size=shape[0] * 3 * np.dtype(np.float32).itemsize)
+        try:
+            shared_points = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+            for bldg_points, start, end in zip(buildings, offsets[:-1], offsets[1:]):
+                shared_points[start:end] = bldg_points
+            del shared_points
+
+            futures = {
+                pool.submit(_process_building_shared, shm.name, shape,
+                            int(start), int(end), building_id, origin): building_id
+                for building_id, start, end in zip(building_ids, offsets[:-1], offsets[1:])
+            }
+
+            results = {}
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Bâtiments", unit="bât"):
+                building_id = futures[future]
+                try:
+                    metadata = future.result()
+                except Exception as e:
+                    logger.error(f"  ✗ Erreur {building_id}: {e}")
+                    continue
+                if metadata is not None:
+                    results[building_id] = metadata
+
+            # Ordre déterministe des métadonnées
+            for bid in building_ids:
+                if bid in results:
+                    self._append_metadata(results[bid])
+        finally:
+            shm.close()
+            shm.unlink()
 
     def _create_merged_model(self, meshes: List[o3d.geometry.TriangleMesh]):
         """Crée un modèle merged"""
         logger.info("\nCréation du modèle merged...")
 
-        combined = o3d.geometry.TriangleMesh()
+        # Tailles totales connues d'avance : un seul tableau de sommets et de
+        # triangles (le += d'Open3D réalloue à chaque bâtiment, coût quadratique)
+        total_v = sum(len(m.vertices) for m in meshes)
+        total_t = sum(len(m.triangles) for m in meshes)
+        vertices = np.empty((total_v, 3), dtype=np.float64)
+        triangles = np.empty((total_t, 3), dtype=np.int32)
 
+        v_off = 0
+        t_off = 0
         for i, mesh in enumerate(meshes):
-            mesh.remove_duplicated_vertices()
-            mesh.remove_duplicated_triangles()
-            mesh.compute_vertex_normals()
-            combined += mesh
+            nv = len(mesh.vertices)
+            nt = len(mesh.triangles)
+            vertices[v_off:v_off + nv] = np.asarray(mesh.vertices)
+            triangles[t_off:t_off + nt] = np.asarray(mesh.triangles) + v_off
+            v_off += nv
+            t_off += nt
 
             if (i + 1) % 50 == 0:
                 logger.info(f" {i+1}/{len(meshes)} bâtiments...")
-                gc.collect()
 
+        combined = o3d.geometry.TriangleMesh(
+            o3d.utility.Vector3dVector(vertices),
+            o3d.utility.Vector3iVector(triangles)
+        )
+        del vertices, triangles
+
+        # Un seul nettoyage sur le modèle complet
         combined.remove_duplicated_vertices()
         combined.remove_duplicated_triangles()
         combined.compute_vertex_normals()
@@ -637,13 +1249,39 @@ class OptimizedBuildingProcessor:
         logger.info(f"✓ Merged: {len(combined.vertices):,} V, {len(combined.triangles):,} T")
 
     def _save_metadata(self):
-        """Sauvegarde les métadonnées"""
+        """Sauvegarde les métadonnées
+        
+        Table par bâtiment en Parquet (pandas + pyarrow) ou, à défaut, en .npy
+        structuré ; metadata.json ne garde qu'un résumé agrégé.
+        """
         metadata_path = self.output_dir / "metadata.json"
+        table = self.metadata
+
+        # Colonnes à plat (x/y/z séparés) pour le format tabulaire
+        columns = {}
+        for name in METADATA_DTYPE.names:
+            if table.dtype[name].shape:
+                for k, axis in enumerate('xyz'):
+                    columns[f"{name}_{axis}"] = table[name][:, k]
+            else:
+                columns[name] = table[name]
+
+        table_path = None
+        if HAS_PANDAS:
+            try:
+                table_path = self.output_dir / "metadata.parquet"
+                pd.DataFrame(columns).to_parquet(table_path, index=False)
+            except ImportError:
+                # Ni pyarrow ni fastparquet
+                table_path = None
+        if table_path is None:
+            table_path = self.output_dir / "metadata.npy"
+            np.save(table_path, table)
 
         data = {
-            'buildings': [asdict(m) for m in self.metadata],
-            'total_buildings': len(self.metadata),
-            'total_courtyards': sum(m.num_courtyards for m in self.metadata),
+            'buildings_table': table_path.name,
+            'total_buildings': int(len(table)),
+            'total_courtyards': int(table['num_courtyards'].sum()),
             'processing_params': {
                 'distance_threshold': self.distance_threshold,
                 'dbscan_eps': self.dbscan_eps,
@@ -656,7 +1294,7 @@ class OptimizedBuildingProcessor:
         with open(metadata_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
 
-        logger.info(f"\n✓ Métadonnées: {metadata_path}")
+        logger.info(f"\n✓ Métadonnées: {metadata_path} (table: {table_path.name})")
 
 
 def main():
@@ -668,7 +1306,9 @@ def main():
         dbscan_eps=8.5,  # Distance max entre points
         dbscan_min_points=100,  # Points min par bâtiment
         grid_size=100.0,  # Taille grille spatiale en mètres
-        max_points_per_cluster=50000  # Limite pour sous-échantillonnage
+        max_points_per_cluster=50000,  # Limite pour sous-échantillonnage
+        n_jobs=-1,  # DBSCAN des cellules sur tous les cœurs
+        max_workers=None  # Un processus par cœur pour les bâtiments
     )
 
     processor.process_all()
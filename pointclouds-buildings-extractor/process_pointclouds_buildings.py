@@ -5,23 +5,326 @@ Extraction et reconstruction de bâtiments → Export GLB pour R3F
 
 import numpy as np
 import open3d as o3d
+import open3d.core as o3c
 import laspy
 import json
 from pathlib import Path
-from typing import List, Dict, Tuple
-from dataclasses import dataclass, asdict
+from typing import List, Dict, Tuple, Optional
+from dataclasses import dataclass
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Import optionnel pour scipy (utilisé pour ConvexHull 2D)
+# Import optionnel pour scipy (plus proches voisins pour l'alpha adaptatif)
 try:
-    from scipy.spatial import ConvexHull
+    from scipy.spatial import cKDTree
     HAS_SCIPY = True
 except ImportError:
     HAS_SCIPY = False
-    logger.warning("scipy non disponible, utilisation d'une méthode alternative pour les enveloppes convexes")
+
+# Import optionnel numba (DBSCAN sur grille compilé)
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+    logger.warning("numba non disponible, DBSCAN Open3D utilisé pour la segmentation")
+
+# Import optionnel cuML (DBSCAN sur GPU pour les grosses tuiles)
+try:
+    import cupy as cp
+    from cuml.cluster import DBSCAN as cuDBSCAN
+    HAS_CUML = True
+except ImportError:
+    HAS_CUML = False
+
+# Import optionnel orjson (encodeur JSON natif, support numpy)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# API tenseur Open3D sur GPU (build CUDA)
+try:
+    HAS_CUDA = o3c.cuda.is_available()
+except AttributeError:
+    HAS_CUDA = False
+
+
+if HAS_NUMBA:
+    @njit(cache=True)
+    def _grid_neighbor_cell(dims, cell_keys, ix, iy, iz):
+        """Indice de la cellule (ix, iy, iz) dans cell_keys, -1 si vide ou hors grille"""
+        if ix < 0 or iy < 0 or iz < 0 or ix >= dims[0] or iy >= dims[1] or iz >= dims[2]:
+            return -1
+        key = (ix * dims[1] + iy) * dims[2] + iz
+        c = np.searchsorted(cell_keys, key)
+        if c < len(cell_keys) and cell_keys[c] == key:
+            return c
+        return -1
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _grid_core_mask(points, cells, dims, cell_keys, cell_starts, order, eps2, min_points):
+        """Points cœurs DBSCAN : au moins min_points voisins (lui-même compris)
+        dans les 27 cellules adjacentes"""
+        n = points.shape[0]
+        core = np.zeros(n, dtype=np.bool_)
+        for i in prange(n):
+            count = 0
+            for dx in range(-1, 2):
+                for dy in range(-1, 2):
+                    for dz in range(-1, 2):
+                        c = _grid_neighbor_cell(dims, cell_keys,
+                                                cells[i, 0] + dx, cells[i, 1] + dy, cells[i, 2] + dz)
+                        if c < 0:
+                            continue
+                        for k in range(cell_starts[c], cell_starts[c + 1]):
+                            j = order[k]
+                            d0 = points[i, 0] - points[j, 0]
+                            d1 = points[i, 1] - points[j, 1]
+                            d2 = points[i, 2] - points[j, 2]
+                            if d0 * d0 + d1 * d1 + d2 * d2 <= eps2:
+                                count += 1
+                        if count >= min_points:
+                            break
+                    if count >= min_points:
+                        break
+                if count >= min_points:
+                    break
+            core[i] = count >= min_points
+        return core
+
+    @njit(cache=True)
+    def _grid_expand(points, cells, dims, cell_keys, cell_starts, order, eps2, core):
+        """Expansion des clusters en largeur depuis les points cœurs"""
+        n = points.shape[0]
+        labels = np.full(n, -1, dtype=np.int32)
+        queue = np.empty(n, dtype=np.int32)  # chaque point est enfilé au plus une fois
+        cluster_id = 0
+        for seed in range(n):
+            if labels[seed] != -1 or not core[seed]:
+                continue
+            labels[seed] = cluster_id
+            queue[0] = seed
+            head = 0
+            tail = 1
+            while head < tail:
+                i = queue[head]
+                head += 1
+                for dx in range(-1, 2):
+                    for dy in range(-1, 2):
+                        for dz in range(-1, 2):
+                            c = _grid_neighbor_cell(dims, cell_keys,
+                                                    cells[i, 0] + dx, cells[i, 1] + dy, cells[i, 2] + dz)
+                            if c < 0:
+                                continue
+                            for k in range(cell_starts[c], cell_starts[c + 1]):
+                                j = order[k]
+                                if labels[j] != -1:
+                                    continue
+                                d0 = points[i, 0] - points[j, 0]
+                                d1 = points[i, 1] - points[j, 1]
+                                d2 = points[i, 2] - points[j, 2]
+                                if d0 * d0 + d1 * d1 + d2 * d2 <= eps2:
+                                    labels[j] = cluster_id
+                                    # Seuls les points cœurs propagent le cluster
+                                    if core[j]:
+                                        queue[tail] = j
+                                        tail += 1
+            cluster_id += 1
+        return labels
+
+    @njit(cache=True)
+    def _metadata_kernel(points, z_q):
+        """Boîte, somme et emprise d'un bâtiment en une seule passe
+
+        Retourne (mins, maxs, sommes, étendue X, étendue Y) où l'emprise est
+        l'ensemble des points de Z strictement inférieur à z_q.
+        """
+        n = points.shape[0]
+        mins = np.empty(3)
+        maxs = np.empty(3)
+        sums = np.zeros(3)
+        for k in range(3):
+            mins[k] = points[0, k]
+            maxs[k] = points[0, k]
+        fx_min = np.inf
+        fx_max = -np.inf
+        fy_min = np.inf
+        fy_max = -np.inf
+        for i in range(n):
+            for k in range(3):
+                v = points[i, k]
+                sums[k] += v
+                if v < mins[k]:
+                    mins[k] = v
+                if v > maxs[k]:
+                    maxs[k] = v
+            if points[i, 2] < z_q:
+                x = points[i, 0]
+                y = points[i, 1]
+                if x < fx_min:
+                    fx_min = x
+                if x > fx_max:
+                    fx_max = x
+                if y < fy_min:
+                    fy_min = y
+                if y > fy_max:
+                    fy_max = y
+        if fx_max < fx_min:
+            return mins, maxs, sums, 0.0, 0.0
+        return mins, maxs, sums, fx_max - fx_min, fy_max - fy_min
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _adaptive_alpha(points, cell):
+        """Alpha d'un plan : 1.5 × distance médiane au plus proche voisin, borné à [0.3, 1.5]
+
+        Le plus proche voisin est cherché dans les 27 cellules d'une grille de
+        pas `cell` : exact pour toute distance <= cell. Avec cell = 1 m, les
+        distances plus grandes ne changent pas l'alpha (borne 1.5 atteinte).
+        Les points confondus sont ignorés, comme les distances nulles avant.
+        """
+        n = points.shape[0]
+        mins = np.empty(3)
+        maxs = np.empty(3)
+        for k in range(3):
+            mins[k] = points[:, k].min()
+            maxs[k] = points[:, k].max()
+        if n < 2 or (maxs[0] == mins[0] and maxs[1] == mins[1] and maxs[2] == mins[2]):
+            return 0.5
+
+        # Grille : points triés par identifiant de cellule
+        cells = np.empty((n, 3), dtype=np.int64)
+        dims = np.empty(3, dtype=np.int64)
+        for k in range(3):
+            dims[k] = int((maxs[k] - mins[k]) / cell) + 1
+        keys = np.empty(n, dtype=np.int64)
+        for i in range(n):
+            for k in range(3):
+                cells[i, k] = int((points[i, k] - mins[k]) / cell)
+            keys[i] = (cells[i, 0] * dims[1] + cells[i, 1]) * dims[2] + cells[i, 2]
+        order = np.argsort(keys)
+        sorted_keys = keys[order]
+        n_cells = 1
+        for i in range(1, n):
+            if sorted_keys[i] != sorted_keys[i - 1]:
+                n_cells += 1
+        cell_keys = np.empty(n_cells, dtype=np.int64)
+        cell_starts = np.empty(n_cells + 1, dtype=np.int64)
+        c = 0
+        cell_keys[0] = sorted_keys[0]
+        cell_starts[0] = 0
+        for i in range(1, n):
+            if sorted_keys[i] != sorted_keys[i - 1]:
+                c += 1
+                cell_keys[c] = sorted_keys[i]
+                cell_starts[c] = i
+        cell_starts[n_cells] = n
+
+        # Distance au plus proche voisin distinct (1e30 = aucun dans les 27 cellules)
+        nn_dist = np.empty(n)
+        for i in prange(n):
+            best = 1e30
+            for dx in range(-1, 2):
+                for dy in range(-1, 2):
+                    for dz in range(-1, 2):
+                        nc = _grid_neighbor_cell(dims, cell_keys,
+                                                 cells[i, 0] + dx, cells[i, 1] + dy, cells[i, 2] + dz)
+                        if nc < 0:
+                            continue
+                        for q in range(cell_starts[nc], cell_starts[nc + 1]):
+                            j = order[q]
+                            d0 = points[i, 0] - points[j, 0]
+                            d1 = points[i, 1] - points[j, 1]
+                            d2 = points[i, 2] - points[j, 2]
+                            d = d0 * d0 + d1 * d1 + d2 * d2
+                            if d > 0 and d < best:
+                                best = d
+            nn_dist[i] = np.sqrt(best)
+
+        return max(0.3, min(1.5, np.median(nn_dist) * 1.5))
+
+
+def _percentile_partition(values: np.ndarray, q: float) -> float:
+    """Percentile exact (interpolation linéaire, comme np.percentile) par
+    sélection partielle au lieu d'un tri"""
+    pos = q / 100.0 * (len(values) - 1)
+    lo = int(np.floor(pos))
+    hi = min(lo + 1, len(values) - 1)
+    part = np.partition(values, [lo, hi])
+    return float(part[lo] + (pos - lo) * (part[hi] - part[lo]))
+
+
+def _monotone_chain_2d(pts2d: np.ndarray) -> np.ndarray:
+    """Enveloppe convexe 2D (chaîne monotone d'Andrew)
+
+    Retourne les indices des sommets dans le sens trigonométrique. Les points
+    strictement intérieurs au quadrilatère des 4 points extrêmes selon les
+    diagonales sont d'abord écartés par un test vectorisé (Akl–Toussaint) :
+    la boucle ne parcourt que les candidats restants.
+    """
+    n = len(pts2d)
+    if n < 3:
+        return np.arange(n)
+    
+    candidates = np.arange(n)
+    if n > 64:
+        s = pts2d[:, 0] + pts2d[:, 1]
+        d = pts2d[:, 0] - pts2d[:, 1]
+        # Bas-gauche, bas-droite, haut-droite, haut-gauche : ordre trigonométrique
+        quad = pts2d[[s.argmin(), d.argmax(), s.argmax(), d.argmin()]]
+        edges = np.roll(quad, -1, axis=0) - quad
+        rel = pts2d[:, None, :] - quad[None, :, :]
+        cross = edges[None, :, 0] * rel[:, :, 1] - edges[None, :, 1] * rel[:, :, 0]
+        candidates = np.flatnonzero(~np.all(cross > 0, axis=1))
+    
+    # Tri lexicographique (x, puis y)
+    order = candidates[np.lexsort((pts2d[candidates, 1], pts2d[candidates, 0]))]
+    xy = pts2d.tolist()
+    
+    def turn(o, a, b):
+        return (xy[a][0] - xy[o][0]) * (xy[b][1] - xy[o][1]) - \
+               (xy[a][1] - xy[o][1]) * (xy[b][0] - xy[o][0])
+    
+    lower = []
+    for i in order.tolist():
+        while len(lower) >= 2 and turn(lower[-2], lower[-1], i) <= 0:
+            lower.pop()
+        lower.append(i)
+    upper = []
+    for i in order[::-1].tolist():
+        while len(upper) >= 2 and turn(upper[-2], upper[-1], i) <= 0:
+            upper.pop()
+        upper.append(i)
+    
+    return np.array(lower[:-1] + upper[:-1], dtype=np.int64)
+
+
+def _grid_dbscan(points: np.ndarray, eps: float, min_points: int) -> np.ndarray:
+    """DBSCAN sur une grille uniforme de pas eps
+
+    Les points sont triés par identifiant de cellule ; les voisins d'un point
+    sont cherchés dans les 27 cellules adjacentes (recherche dichotomique
+    dans la liste des cellules occupées) au lieu d'un parcours d'arbre.
+    Même sémantique que cluster_dbscan d'Open3D (labels -1 = bruit).
+    """
+    cells = np.floor((points - points.min(axis=0)) / eps).astype(np.int64)
+    dims = cells.max(axis=0) + 1
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+    order = np.argsort(keys, kind='stable')
+    cell_keys, cell_starts = np.unique(keys[order], return_index=True)
+    cell_starts = np.append(cell_starts, len(points)).astype(np.int64)
+
+    eps2 = eps * eps
+    core = _grid_core_mask(points, cells, dims, cell_keys, cell_starts, order, eps2, min_points)
+    return _grid_expand(points, cells, dims, cell_keys, cell_starts, order, eps2, core)
 
 
 @dataclass
@@ -37,6 +340,292 @@ class BuildingMetadata:
     height_m: float
 
 
+class BuildingMetadataTable:
+    """Métadonnées des bâtiments en colonnes (structure de tableaux)
+
+    Les champs numériques sont des tableaux numpy agrandis par doublement,
+    les identifiants une liste ; la sérialisation convertit chaque colonne
+    en une fois (tolist) au lieu de parcourir des dataclasses.
+    """
+
+    _COLUMNS = ('num_points', 'num_planes', 'bbox_min', 'bbox_max', 'center', 'area_m2', 'height_m')
+
+    def __init__(self, capacity: int = 256):
+        self.ids: List[str] = []
+        self.num_points = np.empty(capacity, dtype=np.int64)
+        self.num_planes = np.empty(capacity, dtype=np.int32)
+        self.bbox_min = np.empty((capacity, 3), dtype=np.float64)
+        self.bbox_max = np.empty((capacity, 3), dtype=np.float64)
+        self.center = np.empty((capacity, 3), dtype=np.float64)
+        self.area_m2 = np.empty(capacity, dtype=np.float64)
+        self.height_m = np.empty(capacity, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, m: BuildingMetadata):
+        """Ajoute un bâtiment (ligne i = len(self))"""
+        i = len(self.ids)
+        if i == len(self.num_points):
+            for name in self._COLUMNS:
+                col = getattr(self, name)
+                grown = np.empty((2 * len(col),) + col.shape[1:], dtype=col.dtype)
+                grown[:i] = col
+                setattr(self, name, grown)
+        self.ids.append(m.id)
+        self.num_points[i] = m.num_points
+        self.num_planes[i] = m.num_planes
+        self.bbox_min[i] = m.bbox_min
+        self.bbox_max[i] = m.bbox_max
+        self.center[i] = m.center
+        self.area_m2[i] = m.area_m2
+        self.height_m[i] = m.height_m
+
+    def to_records(self) -> List[Dict]:
+        """Liste de dicts (format de metadata.json), colonnes converties en bloc"""
+        n = len(self.ids)
+        cols = [getattr(self, name)[:n].tolist() for name in self._COLUMNS]
+        return [
+            {'id': bid, 'num_points': npts, 'num_planes': nplanes,
+             'bbox_min': bmin, 'bbox_max': bmax, 'center': ctr,
+             'area_m2': area, 'height_m': height}
+            for bid, npts, nplanes, bmin, bmax, ctr, area, height in zip(self.ids, *cols)
+        ]
+
+
+# Directions des points extrêmes pour le pré-filtrage Akl–Toussaint :
+# les 3 axes et les 4 diagonales, dans les deux sens
+_AKL_DIRECTIONS = np.array([
+    [1, 0, 0], [0, 1, 0], [0, 0, 1],
+    [1, 1, 1], [1, 1, -1], [1, -1, 1], [-1, 1, 1],
+], dtype=np.float64)
+
+
+def _akl_toussaint_filter(points: np.ndarray) -> np.ndarray:
+    """Écarte les points strictement intérieurs au polyèdre des points extrêmes
+
+    Heuristique d'Akl–Toussaint en 3D : l'enveloppe des 14 points extrêmes
+    (min/max le long des axes et des diagonales) est incluse dans l'enveloppe
+    complète, donc un point à l'intérieur de toutes ses faces n'est pas un
+    sommet de l'enveloppe convexe. Un seul produit (n, 3) x (3, faces).
+    Retourne les points candidats (tous si le polyèdre est dégénéré).
+    """
+    if len(points) < 64:
+        return points
+    
+    proj = points @ _AKL_DIRECTIONS.T
+    extreme_idx = np.unique(np.concatenate([proj.argmin(axis=0), proj.argmax(axis=0)]))
+    extremes = points[extreme_idx]
+    
+    try:
+        pcd = o3d.geometry.PointCloud()
+        pcd.points = o3d.utility.Vector3dVector(extremes)
+        hull, _ = pcd.compute_convex_hull()
+    except RuntimeError:
+        # Points extrêmes coplanaires : pas de filtrage
+        return points
+    
+    # Plans des faces orientés vers l'extérieur (le centroïde est intérieur)
+    v = np.asarray(hull.vertices)
+    tri = np.asarray(hull.triangles)
+    if len(tri) == 0:
+        return points
+    normals = np.cross(v[tri[:, 1]] - v[tri[:, 0]], v[tri[:, 2]] - v[tri[:, 0]])
+    offsets = np.einsum('ij,ij->i', normals, v[tri[:, 0]])
+    centroid = v.mean(axis=0)
+    outward = np.where(normals @ centroid - offsets > 0, -1.0, 1.0)
+    normals *= outward[:, None]
+    offsets *= outward
+    
+    # Marge relative pour ne jamais écarter un point sur une face
+    tol = 1e-9 * np.abs(normals).sum(axis=1) * np.abs(points).max()
+    inside = np.all(points @ normals.T - offsets < -tol, axis=1)
+    return points[~inside]
+
+
+def _convex_hull_mesh(points: np.ndarray) -> o3d.geometry.TriangleMesh:
+    """Enveloppe convexe 3D après pré-filtrage Akl–Toussaint"""
+    pcd = o3d.geometry.PointCloud()
+    pcd.points = o3d.utility.Vector3dVector(_akl_toussaint_filter(points))
+    mesh, _ = pcd.compute_convex_hull()
+    return mesh
+
+
+def _hull_and_tri(points: np.ndarray,
+                  plane_eq: np.ndarray) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """
+    Surface plane d'un plan RANSAC : (sommets, triangles, normales ou None)
+    Préserve les angles en créant un polygone 2D puis en le triangulant
+    
+    Fonction de module (sérialisable) retournant des tableaux numpy : le
+    mesh Open3D est assemblé par l'appelant.
+    """
+    empty = (np.empty((0, 3)), np.empty((0, 3), dtype=np.int32), None)
+    if len(points) < 3:
+        return empty
+    
+    # Normal du plan: [a, b, c]
+    normal = plane_eq[:3]
+    normal = normal / np.linalg.norm(normal)
+    
+    # Trouver un point sur le plan (point moyen des points)
+    center = points.mean(axis=0)
+    
+    # Créer un système de coordonnées 2D sur le plan
+    # Vecteur arbitraire perpendiculaire à la normale
+    if abs(normal[0]) < 0.9:
+        u = np.array([1, 0, 0])
+    else:
+        u = np.array([0, 1, 0])
+    
+    # Vecteurs de base du plan
+    u = u - np.dot(u, normal) * normal
+    u = u / np.linalg.norm(u)
+    v = np.cross(normal, u)
+    
+    # Projeter tous les points sur le plan 2D (un seul produit matriciel)
+    basis = np.column_stack((u, v))  # (3, 2)
+    points_2d = (points - center) @ basis  # (n, 2)
+    
+    # Créer un polygone à partir des points projetés
+    # Utiliser alpha shape directement sur les points 3D pour préserver les limites concaves
+    # au lieu d'une enveloppe convexe qui peut dépasser les limites réelles
+    try:
+        # Utiliser alpha shape directement sur les points 3D du plan
+        # Cela préserve mieux les limites concaves et évite de dépasser les limites réelles
+        pcd_plane = o3d.geometry.PointCloud()
+        pcd_plane.points = o3d.utility.Vector3dVector(points)
+        
+        # Calculer alpha adaptatif basé sur la densité des points
+        # Distance médiane entre points voisins (plus proche voisin)
+        if HAS_NUMBA:
+            alpha = _adaptive_alpha(np.ascontiguousarray(points, dtype=np.float64), 1.0)
+        else:
+            if HAS_SCIPY:
+                nn_dist, _ = cKDTree(points).query(points, k=2, workers=-1)
+                distances = nn_dist[:, 1]
+            else:
+                distances = np.asarray(pcd_plane.compute_nearest_neighbor_distance())
+            non_zero_distances = distances[distances > 0]
+            if len(non_zero_distances) > 0:
+                median_distance = np.median(non_zero_distances)
+                # Alpha adaptatif : plus petit pour préserver les détails
+                alpha = max(0.3, min(1.5, median_distance * 1.5))
+            else:
+                alpha = 0.5
+        
+        try:
+            # Essayer alpha shape d'abord (préserve mieux les limites concaves)
+            mesh_alpha = o3d.geometry.TriangleMesh.create_from_point_cloud_alpha_shape(
+                pcd_plane, alpha
+            )
+            
+            if len(mesh_alpha.vertices) > 0:
+                # Utiliser directement le mesh de l'alpha shape
+                # Il préserve mieux les limites concaves et ne dépasse pas les limites réelles
+                # (normales calculées une seule fois sur le mesh du bâtiment)
+                return np.asarray(mesh_alpha.vertices), np.asarray(mesh_alpha.triangles), None
+            else:
+                raise ValueError("Alpha shape vide")
+        except:
+            # Fallback: utiliser convex hull 2D si alpha shape échoue
+            hull_indices = _monotone_chain_2d(points_2d)
+            hull_points_3d = points[hull_indices]
+            
+            # Trianguler le polygone convexe (fan triangulation)
+            num_verts = len(hull_points_3d)
+            if num_verts < 3:
+                return empty
+            idx = np.arange(1, num_verts - 1, dtype=np.int32)
+            triangles = np.column_stack((np.zeros_like(idx), idx, idx + 1))
+            
+            # Calculer les normales (toutes pointent vers la normale du plan)
+            normals = np.broadcast_to(normal, (num_verts, 3)).copy()
+            
+            return hull_points_3d, triangles, normals
+        
+    except Exception as e:
+        logger.warning(f"Erreur création mesh plan: {e}")
+        # Fallback: utiliser alpha shape avec alpha très petit pour préserver les angles
+        pcd = o3d.geometry.PointCloud()
+        pcd.points = o3d.utility.Vector3dVector(points)
+        
+        try:
+            # Alpha très petit pour préserver les angles
+            mesh = o3d.geometry.TriangleMesh.create_from_point_cloud_alpha_shape(
+                pcd, alpha=0.1
+            )
+            return np.asarray(mesh.vertices), np.asarray(mesh.triangles), None
+        except:
+            return empty
+
+
+def _concatenate_meshes(meshes: List[o3d.geometry.TriangleMesh],
+                        keep_normals: bool = True) -> o3d.geometry.TriangleMesh:
+    """Concatène des meshes en un seul, sans fusion de sommets
+
+    Tailles totales connues d'avance : un seul tableau de sommets et de
+    triangles (le += d'Open3D réalloue à chaque ajout, coût quadratique).
+    Les meshes restent disjoints : seuls les indices sont décalés. Couleurs
+    et normales sont conservées si tous les meshes en ont (comme avec +=) ;
+    keep_normals=False les ignore quand l'appelant les recalcule.
+    """
+    total_v = sum(len(m.vertices) for m in meshes)
+    total_t = sum(len(m.triangles) for m in meshes)
+    vertices = np.empty((total_v, 3), dtype=np.float64)
+    triangles = np.empty((total_t, 3), dtype=np.int32)
+    has_colors = len(meshes) > 0 and all(m.has_vertex_colors() for m in meshes)
+    has_normals = keep_normals and len(meshes) > 0 and all(m.has_vertex_normals() for m in meshes)
+    colors = np.empty((total_v, 3), dtype=np.float64) if has_colors else None
+    normals = np.empty((total_v, 3), dtype=np.float64) if has_normals else None
+    
+    v_off = 0
+    t_off = 0
+    for mesh in meshes:
+        nv = len(mesh.vertices)
+        nt = len(mesh.triangles)
+        vertices[v_off:v_off + nv] = np.asarray(mesh.vertices)
+        triangles[t_off:t_off + nt] = np.asarray(mesh.triangles) + v_off
+        if has_colors:
+            colors[v_off:v_off + nv] = np.asarray(mesh.vertex_colors)
+        if has_normals:
+            normals[v_off:v_off + nv] = np.asarray(mesh.vertex_normals)
+        v_off += nv
+        t_off += nt
+    
+    combined = o3d.geometry.TriangleMesh(
+        o3d.utility.Vector3dVector(vertices),
+        o3d.utility.Vector3iVector(triangles)
+    )
+    if has_colors:
+        combined.vertex_colors = o3d.utility.Vector3dVector(colors)
+    if has_normals:
+        combined.vertex_normals = o3d.utility.Vector3dVector(normals)
+    return combined
+
+
+# Processeur du worker (installé une fois par processus par l'initializer du pool)
+_worker_processor = None
+
+
+def _init_building_worker(processor):
+    """Initializer du pool : reçoit une copie du processeur (paramètres, dossiers)"""
+    global _worker_processor
+    _worker_processor = processor
+
+
+def _process_one_building(building_id: str, bldg_points: np.ndarray,
+                          origin: np.ndarray) -> Optional[BuildingMetadata]:
+    """Traite un bâtiment dans un worker
+
+    Le GLB est écrit par le worker ; seules les métadonnées reviennent au parent.
+    """
+    result = _worker_processor.process_building(building_id, bldg_points, origin)
+    # Le parent relit les GLB : l'écriture doit être terminée avant le retour
+    _worker_processor._drain_exports()
+    return None if result is None else result[0]
+
+
 class MetzBuildingProcessor:
     """
     Processeur pour les nuages de points de Metz
@@ -45,12 +634,14 @@ class MetzBuildingProcessor:
     def __init__(self, 
                  input_dir: str = None,
                  output_dir: str = None,
-                 distance_threshold: float = 0.3):
+                 distance_threshold: float = 0.3,
+                 max_workers: Optional[int] = None):
         """
         Args:
             input_dir: Dossier contenant les fichiers .copc.laz (relatif à la racine du projet)
             output_dir: Dossier de sortie pour les .glb (relatif à la racine du projet)
             distance_threshold: Seuil RANSAC en mètres
+            max_workers: Nombre de processus pour traiter les bâtiments (None = tous les cœurs, 1 = séquentiel)
         """
         # Obtenir la racine du projet (un niveau au-dessus du dossier du script)
         project_root = Path(__file__).parent.parent
@@ -76,17 +667,46 @@ class MetzBuildingProcessor:
                 # Sinon, traiter comme chemin absolu ou relatif au répertoire courant
                 self.output_dir = Path(output_dir)
         self.distance_threshold = distance_threshold
+        self.max_workers = max_workers
         
         # Créer les dossiers de sortie
         self.buildings_dir = self.output_dir / "buildings"
         self.buildings_dir.mkdir(parents=True, exist_ok=True)
         
-        self.metadata = []
+        self.metadata = BuildingMetadataTable()
+        
+        # Exports GLB en arrière-plan (l'écriture Open3D libère le GIL) :
+        # recouvre l'I/O d'un bâtiment avec le calcul du suivant
+        self._io_pool = ThreadPoolExecutor(max_workers=2)
+        self._io_futures = []
+    
+    def __getstate__(self):
+        """Copie envoyée aux workers : sans le pool d'I/O (non sérialisable)"""
+        state = self.__dict__.copy()
+        del state['_io_pool'], state['_io_futures']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._io_pool = ThreadPoolExecutor(max_workers=2)
+        self._io_futures = []
+    
+    def _drain_exports(self):
+        """Attend la fin des exports GLB en cours"""
+        for future in self._io_futures:
+            future.result()
+        self._io_futures = []
         
     def find_laz_files(self) -> List[Path]:
-        """Trouve tous les fichiers .laz/.copc.laz"""
-        laz_files = list(self.input_dir.glob("*.laz")) + \
-                    list(self.input_dir.glob("*.copc.laz"))
+        """Trouve tous les fichiers .laz/.copc.laz (sans doublons)"""
+        # Un seul parcours du dossier ; *.copc.laz est inclus dans *.laz
+        laz_files = []
+        if self.input_dir.is_dir():
+            with os.scandir(self.input_dir) as it:
+                laz_files = sorted(
+                    Path(e.path) for e in it
+                    if e.is_file() and e.name.endswith('.laz')
+                )  # Trier pour ordre déterministe
         
         logger.info(f"Fichiers .laz trouvés: {len(laz_files)}")
         for f in laz_files:
@@ -94,39 +714,46 @@ class MetzBuildingProcessor:
         
         return laz_files
     
-    def load_point_cloud(self, filepath: Path) -> Tuple[np.ndarray, np.ndarray]:
-        """Charge un fichier LAZ et retourne points + classifications"""
-        logger.info(f"Chargement: {filepath.name}")
+    def load_point_cloud(self, filepath: Path,
+                         chunk_size: int = 2_000_000) -> Tuple[np.ndarray, np.ndarray]:
+        """Charge les points 'Bâtiment' d'un fichier LAZ et retourne points + origine
         
-        las = laspy.read(str(filepath))
-        
-        # Coordonnées XYZ
-        points = np.vstack((las.x, las.y, las.z)).transpose()
+        Lecture par blocs (chunk_iterator) avec filtrage de classe à la volée :
+        le nuage complet n'est jamais décompressé en mémoire, le pic est d'un
+        bloc plus les points bâtiments retenus.
+        Standard LAS: classe 6 = Bâtiment
         
-        # Classifications (standard LAS)
-        if hasattr(las, 'classification'):
-            classifications = np.array(las.classification)
-        else:
-            classifications = np.zeros(len(points), dtype=np.uint8)
+        Les points sont en float32 (tableau contigu rempli colonne par colonne),
+        relatifs à l'origine de la tuile : en Lambert-93, un float32 absolu n'a
+        qu'une précision de ~0.5 m en Y, contre le mm en relatif.
+        """
+        logger.info(f"Chargement: {filepath.name}")
         
-        logger.info(f"  Points: {len(points):,}")
-        logger.info(f"  Classes: {np.unique(classifications)}")
+        kept = []
+        with laspy.open(str(filepath)) as reader:
+            n_total = reader.header.point_count
+            mins = reader.header.mins
+            origin = np.array([np.floor(mins[0]), np.floor(mins[1]), 0.0])
+            
+            for chunk in reader.chunk_iterator(chunk_size):
+                # Classe 6 = Bâtiment selon LAS 1.4
+                mask = np.asarray(chunk.classification) == 6
+                n = int(np.count_nonzero(mask))
+                if n == 0:
+                    continue
+                xyz = np.empty((n, 3), dtype=np.float32)
+                xyz[:, 0] = np.asarray(chunk.x)[mask] - origin[0]
+                xyz[:, 1] = np.asarray(chunk.y)[mask] - origin[1]
+                xyz[:, 2] = np.asarray(chunk.z)[mask]
+                kept.append(xyz)
         
-        return points, classifications
-    
-    def extract_buildings(self, points: np.ndarray, 
-                         classifications: np.ndarray) -> np.ndarray:
-        """
-        Extrait les points classifiés comme 'Bâtiment'
-        Standard LAS: classe 6 = Bâtiment
-        """
-        # Classe 6 = Bâtiment selon LAS 1.4
-        building_mask = classifications == 6
-        building_points = points[building_mask]
+        building_points = np.concatenate(kept) if kept else np.empty((0, 3), dtype=np.float32)
+        del kept
         
+        logger.info(f"  Points: {n_total:,}")
         logger.info(f"  Bâtiments: {len(building_points):,} points")
         
-        return building_points
+        return building_points, origin
     
     def segment_buildings_by_proximity(self, 
                                       points: np.ndarray,
@@ -141,28 +768,31 @@ class MetzBuildingProcessor:
         """
         logger.info("Segmentation des bâtiments individuels...")
         
-        pcd = o3d.geometry.PointCloud()
-        pcd.points = o3d.utility.Vector3dVector(points)
-        
         # DBSCAN pour identifier les bâtiments séparés
-        labels = np.array(pcd.cluster_dbscan(
-            eps=eps,
-            min_points=min_points,
-            print_progress=False
-        ))
-        
-        # Extraire chaque cluster
-        unique_labels = np.unique(labels)
+        # (GPU au-delà de 100k points : en deçà, le transfert ne vaut pas le coup)
+        if HAS_CUML and len(points) > 100_000:
+            labels = cuDBSCAN(eps=eps, min_samples=min_points).fit_predict(cp.asarray(points))
+            labels = cp.asnumpy(labels)
+        elif HAS_NUMBA:
+            labels = _grid_dbscan(points, eps, min_points)
+        else:
+            pcd = o3d.geometry.PointCloud()
+            pcd.points = o3d.utility.Vector3dVector(np.ascontiguousarray(points, dtype=np.float64))
+            labels = np.array(pcd.cluster_dbscan(
+                eps=eps,
+                min_points=min_points,
+                print_progress=False
+            ))
+        
+        # Extraire chaque cluster en une passe (tri par label, bruit = -1 écarté)
+        kept = np.flatnonzero(labels >= 0)
+        kept = kept[np.argsort(labels[kept], kind='stable')]
+        _, starts = np.unique(labels[kept], return_index=True)
         buildings = []
         
-        for label in unique_labels:
-            if label == -1:  # Bruit
-                continue
-                
-            cluster_points = points[labels == label]
-            
-            if len(cluster_points) >= min_points:
-                buildings.append(cluster_points)
+        for cluster_idx in np.split(kept, starts[1:]):
+            if len(cluster_idx) >= min_points:
+                buildings.append(points[cluster_idx])
         
         logger.info(f"  {len(buildings)} bâtiments détectés")
         
@@ -171,18 +801,30 @@ class MetzBuildingProcessor:
     def extract_planes_ransac(self, points: np.ndarray,
                              max_planes: int = 6,
                              min_points: int = 50) -> List[Dict]:
-        """Extrait les plans dominants avec RANSAC"""
+        """Extrait les plans dominants avec RANSAC
         
-        pcd = o3d.geometry.PointCloud()
-        pcd.points = o3d.utility.Vector3dVector(points)
+        Avec un build CUDA d'Open3D, RANSAC tourne sur GPU (API tenseur) ;
+        sinon, ou en cas d'échec, RANSAC CPU legacy.
+        """
+        if HAS_CUDA:
+            try:
+                return self._extract_planes_ransac_cuda(points, max_planes, min_points)
+            except Exception as e:
+                logger.warning(f"RANSAC GPU échoué: {e}, utilisation du CPU")
+        
+        # Points restants suivis par indices : un seul nuage Open3D par plan,
+        # au lieu de deux copies select_by_index (inliers + reste)
+        active_idx = np.arange(len(points), dtype=np.int64)
         
         planes = []
-        remaining_pcd = pcd
         
         for i in range(max_planes):
-            if len(remaining_pcd.points) < min_points:
+            if len(active_idx) < min_points:
                 break
             
+            remaining_pcd = o3d.geometry.PointCloud()
+            remaining_pcd.points = o3d.utility.Vector3dVector(points[active_idx])
+            
             plane_model, inliers = remaining_pcd.segment_plane(
                 distance_threshold=self.distance_threshold,
                 ransac_n=3,
@@ -192,15 +834,55 @@ class MetzBuildingProcessor:
             if len(inliers) < min_points:
                 break
             
-            inlier_cloud = remaining_pcd.select_by_index(inliers)
-            inlier_points = np.asarray(inlier_cloud.points)
+            inliers = np.asarray(inliers, dtype=np.int64)
             
             planes.append({
                 'equation': plane_model,
-                'points': inlier_points,
+                'points': points[active_idx[inliers]],
                 'num_points': len(inliers)
             })
             
+            keep = np.ones(len(active_idx), dtype=bool)
+            keep[inliers] = False
+            active_idx = active_idx[keep]
+        
+        return planes
+    
+    def _extract_planes_ransac_cuda(self, points: np.ndarray,
+                                    max_planes: int,
+                                    min_points: int) -> List[Dict]:
+        """RANSAC sur GPU : le nuage restant et les inliers restent sur le device,
+        seuls les points de chaque plan reviennent sur l'hôte"""
+        device = o3c.Device("CUDA:0")
+        remaining_pcd = o3d.t.geometry.PointCloud(
+            o3c.Tensor(np.ascontiguousarray(points), device=device)
+        )
+        
+        planes = []
+        
+        for i in range(max_planes):
+            if remaining_pcd.point.positions.shape[0] < min_points:
+                break
+            
+            plane_model, inliers = remaining_pcd.segment_plane(
+                distance_threshold=self.distance_threshold,
+                ransac_n=3,
+                num_iterations=1000
+            )
+            
+            num_inliers = inliers.shape[0]
+            if num_inliers < min_points:
+                break
+            
+            inlier_cloud = remaining_pcd.select_by_index(inliers)
+            inlier_points = inlier_cloud.point.positions.cpu().numpy().astype(np.float64)
+            
+            planes.append({
+                'equation': plane_model.cpu().numpy(),
+                'points': inlier_points,
+                'num_points': num_inliers
+            })
+            
             remaining_pcd = remaining_pcd.select_by_index(inliers, invert=True)
         
         return planes
@@ -218,16 +900,14 @@ class MetzBuildingProcessor:
             mesh = self._create_mesh_from_planes(planes)
         else:
             # Fallback: enveloppe convexe
-            pcd = o3d.geometry.PointCloud()
-            pcd.points = o3d.utility.Vector3dVector(points)
-            mesh, _ = pcd.compute_convex_hull()
+            mesh = _convex_hull_mesh(points)
         
         # Nettoyer le mesh
         mesh.remove_duplicated_vertices()
         mesh.remove_duplicated_triangles()
         mesh.remove_degenerate_triangles()
         
-        # Calculer les normales pour un bon rendu
+        # Calculer les normales pour un bon rendu (une seule fois, après nettoyage)
         mesh.compute_vertex_normals()
         
         # Couleur grise pour les bâtiments
@@ -240,20 +920,27 @@ class MetzBuildingProcessor:
         Crée un mesh à partir de plans RANSAC en préservant les angles nets
         Chaque plan est converti en une surface plane polygonale
         """
-        combined_mesh = o3d.geometry.TriangleMesh()
+        # Surfaces de tous les plans en un seul lot ([a, b, c, d] où ax + by + cz + d = 0).
+        # _hull_and_tri est sérialisable, mais un map simple suffit : ce code tourne
+        # déjà dans un worker du pool des bâtiments (un pool imbriqué surchargerait les cœurs)
+        plane_inputs = [(p['points'], p['equation']) for p in planes if len(p['points']) >= 3]
+        results = list(map(_hull_and_tri, *zip(*plane_inputs))) if plane_inputs else []
         
-        for plane in planes:
-            points = plane['points']
-            plane_eq = plane['equation']  # [a, b, c, d] où ax + by + cz + d = 0
-            
-            if len(points) < 3:
+        plane_meshes = []
+        for vertices, triangles, normals in results:
+            if len(vertices) == 0:
                 continue
             
-            # Créer une surface plane à partir des points du plan
-            plane_mesh = self._create_flat_plane_mesh(points, plane_eq)
-            
-            if len(plane_mesh.vertices) > 0:
-                combined_mesh += plane_mesh
+            # Assembler le mesh du plan sur le processus courant
+            plane_mesh = o3d.geometry.TriangleMesh(
+                o3d.utility.Vector3dVector(vertices),
+                o3d.utility.Vector3iVector(triangles)
+            )
+            if normals is not None:
+                plane_mesh.vertex_normals = o3d.utility.Vector3dVector(normals)
+            plane_meshes.append(plane_mesh)
+        
+        combined_mesh = _concatenate_meshes(plane_meshes)
         
         if len(combined_mesh.vertices) == 0:
             # Fallback: utiliser convex hull global mais avec Poisson pour préserver les angles
@@ -281,143 +968,41 @@ class MetzBuildingProcessor:
                 combined_mesh = mesh
             except:
                 # Dernier recours: convex hull
-                combined_mesh, _ = pcd_all.compute_convex_hull()
+                combined_mesh = _convex_hull_mesh(all_points)
         
         return combined_mesh
     
-    def _create_flat_plane_mesh(self, points: np.ndarray, plane_eq: np.ndarray) -> o3d.geometry.TriangleMesh:
-        """
-        Crée un mesh plat à partir des points d'un plan
-        Préserve les angles en créant un polygone 2D puis en le triangulant
-        """
-        if len(points) < 3:
-            return o3d.geometry.TriangleMesh()
-        
-        # Normal du plan: [a, b, c]
-        normal = plane_eq[:3]
-        normal = normal / np.linalg.norm(normal)
-        
-        # Trouver un point sur le plan (point moyen des points)
-        center = points.mean(axis=0)
-        
-        # Créer un système de coordonnées 2D sur le plan
-        # Vecteur arbitraire perpendiculaire à la normale
-        if abs(normal[0]) < 0.9:
-            u = np.array([1, 0, 0])
-        else:
-            u = np.array([0, 1, 0])
-        
-        # Vecteurs de base du plan
-        u = u - np.dot(u, normal) * normal
-        u = u / np.linalg.norm(u)
-        v = np.cross(normal, u)
-        
-        # Projeter tous les points sur le plan 2D
-        points_2d = []
-        for pt in points:
-            vec = pt - center
-            x_2d = np.dot(vec, u)
-            y_2d = np.dot(vec, v)
-            points_2d.append([x_2d, y_2d])
-        
-        points_2d = np.array(points_2d)
-        
-        # Créer un polygone à partir des points projetés
-        # Utiliser alpha shape directement sur les points 3D pour préserver les limites concaves
-        # au lieu d'une enveloppe convexe qui peut dépasser les limites réelles
-        try:
-            # Utiliser alpha shape directement sur les points 3D du plan
-            # Cela préserve mieux les limites concaves et évite de dépasser les limites réelles
-            pcd_plane = o3d.geometry.PointCloud()
-            pcd_plane.points = o3d.utility.Vector3dVector(points)
-            
-            # Calculer alpha adaptatif basé sur la densité des points
-            # Distance médiane entre points voisins
-            distances = np.sqrt(np.sum((points[:, np.newaxis, :] - points[np.newaxis, :, :])**2, axis=2))
-            non_zero_distances = distances[distances > 0]
-            if len(non_zero_distances) > 0:
-                median_distance = np.median(non_zero_distances)
-                # Alpha adaptatif : plus petit pour préserver les détails
-                alpha = max(0.3, min(1.5, median_distance * 1.5))
-            else:
-                alpha = 0.5
-            
-            try:
-                # Essayer alpha shape d'abord (préserve mieux les limites concaves)
-                mesh_alpha = o3d.geometry.TriangleMesh.create_from_point_cloud_alpha_shape(
-                    pcd_plane, alpha
-                )
-                
-                if len(mesh_alpha.vertices) > 0:
-                    # Utiliser directement le mesh de l'alpha shape
-                    # Il préserve mieux les limites concaves et ne dépasse pas les limites réelles
-                    mesh_alpha.compute_vertex_normals()
-                    return mesh_alpha
-                else:
-                    raise ValueError("Alpha shape vide")
-            except:
-                # Fallback: utiliser convex hull si alpha shape échoue
-                if HAS_SCIPY:
-                    hull_2d = ConvexHull(points_2d)
-                    hull_indices = hull_2d.vertices
-                    hull_points_3d = points[hull_indices]
-                else:
-                    hull_3d, _ = pcd_plane.compute_convex_hull()
-                    hull_indices = np.unique(np.asarray(hull_3d.triangles).flatten())
-                    hull_points_3d = points[hull_indices]
-                
-                # Créer un mesh à partir du polygone convexe
-                mesh = o3d.geometry.TriangleMesh()
-                mesh.vertices = o3d.utility.Vector3dVector(hull_points_3d)
-                
-                # Trianguler le polygone convexe (fan triangulation)
-                num_verts = len(hull_points_3d)
-                if num_verts >= 3:
-                    triangles = []
-                    for i in range(1, num_verts - 1):
-                        triangles.append([0, i, i + 1])
-                    mesh.triangles = o3d.utility.Vector3iVector(triangles)
-                    
-                    # Calculer les normales (toutes pointent vers la normale du plan)
-                    mesh.vertex_normals = o3d.utility.Vector3dVector(
-                        [normal] * num_verts
-                    )
-                
-                return mesh
-            
-        except Exception as e:
-            logger.warning(f"Erreur création mesh plan: {e}")
-            # Fallback: utiliser alpha shape avec alpha très petit pour préserver les angles
-            pcd = o3d.geometry.PointCloud()
-            pcd.points = o3d.utility.Vector3dVector(points)
-            
-            try:
-                # Alpha très petit pour préserver les angles
-                mesh = o3d.geometry.TriangleMesh.create_from_point_cloud_alpha_shape(
-                    pcd, alpha=0.1
-                )
-                return mesh
-            except:
-                return o3d.geometry.TriangleMesh()
-    
     def compute_building_metadata(self, 
                                   building_id: str,
                                   points: np.ndarray,
-                                  planes: List[Dict]) -> BuildingMetadata:
-        """Calcule les métadonnées d'un bâtiment"""
-        
-        bbox_min = points.min(axis=0).tolist()
-        bbox_max = points.max(axis=0).tolist()
-        center = points.mean(axis=0).tolist()
-        
-        # Estimation de la surface au sol (emprise)
-        footprint_points = points[points[:, 2] < np.percentile(points[:, 2], 20)]
-        if len(footprint_points) > 0:
-            x_range = footprint_points[:, 0].max() - footprint_points[:, 0].min()
-            y_range = footprint_points[:, 1].max() - footprint_points[:, 1].min()
+                                  planes: List[Dict],
+                                  origin: Optional[np.ndarray] = None) -> BuildingMetadata:
+        """Calcule les métadonnées d'un bâtiment (coordonnées absolues si `origin` est fourni)"""
+        if origin is None:
+            origin = np.zeros(3)
+        
+        # Estimation de la surface au sol (emprise) : points sous le 20e percentile de Z
+        z_p20 = _percentile_partition(points[:, 2], 20)
+        
+        if HAS_NUMBA:
+            # Boîte, moyenne et emprise en une passe compilée
+            mins, maxs, sums, x_range, y_range = _metadata_kernel(points, z_p20)
+            bbox_min = (mins + origin).tolist()
+            bbox_max = (maxs + origin).tolist()
+            center = (sums / len(points) + origin).tolist()
             area_m2 = float(x_range * y_range)
         else:
-            area_m2 = 0.0
+            bbox_min = (points.min(axis=0) + origin).tolist()
+            bbox_max = (points.max(axis=0) + origin).tolist()
+            center = (points.mean(axis=0, dtype=np.float64) + origin).tolist()
+            
+            footprint_points = points[points[:, 2] < z_p20]
+            if len(footprint_points) > 0:
+                x_range = footprint_points[:, 0].max() - footprint_points[:, 0].min()
+                y_range = footprint_points[:, 1].max() - footprint_points[:, 1].min()
+                area_m2 = float(x_range * y_range)
+            else:
+                area_m2 = 0.0
         
         # Hauteur
         height_m = float(bbox_max[2] - bbox_min[2])
@@ -468,53 +1053,87 @@ class MetzBuildingProcessor:
         all_buildings = []
         building_counter = 0
         
-        # Traiter chaque fichier LAZ
-        for laz_file in laz_files:
-            logger.info(f"\n{'=' * 70}")
-            logger.info(f"Fichier: {laz_file.name}")
-            logger.info(f"{'=' * 70}")
-            
-            # Charger le nuage de points
-            points, classifications = self.load_point_cloud(laz_file)
-            
-            # Extraire les bâtiments
-            building_points = self.extract_buildings(points, classifications)
-            
-            if len(building_points) == 0:
-                logger.warning("  Aucun point de bâtiment trouvé")
-                continue
-            
-            # Segmenter les bâtiments individuels
-            buildings = self.segment_buildings_by_proximity(building_points)
-            
-            # Traiter chaque bâtiment
-            for i, bldg_points in enumerate(buildings):
-                building_counter += 1
-                building_id = f"building_{building_counter:04d}"
+        # Les bâtiments sont indépendants (RANSAC, maillage, export) : pool de processus
+        max_workers = self.max_workers or os.cpu_count() or 1
+        make_pool = partial(ProcessPoolExecutor, max_workers=max_workers,
+                            initializer=_init_building_worker, initargs=(self,))
+        pool = make_pool() if max_workers > 1 else None
+        
+        try:
+            # Traiter chaque fichier LAZ
+            for laz_file in laz_files:
+                logger.info(f"\n{'=' * 70}")
+                logger.info(f"Fichier: {laz_file.name}")
+                logger.info(f"{'=' * 70}")
                 
-                logger.info(f"\n  Bâtiment {building_id}: {len(bldg_points):,} points")
+                # Charger les points bâtiments (filtrage de classe pendant la lecture)
+                building_points, origin = self.load_point_cloud(laz_file)
                 
-                # Extraire les plans
-                planes = self.extract_planes_ransac(bldg_points)
-                logger.info(f"    Plans détectés: {len(planes)}")
+                if len(building_points) == 0:
+                    logger.warning("  Aucun point de bâtiment trouvé")
+                    continue
                 
-                # Créer le mesh
-                mesh = self.create_building_mesh(bldg_points)
-                logger.info(f"    Mesh: {len(mesh.vertices)} vertices, {len(mesh.triangles)} triangles")
+                # Segmenter les bâtiments individuels
+                buildings = self.segment_buildings_by_proximity(building_points)
                 
-                # Calculer métadonnées
-                metadata = self.compute_building_metadata(
-                    building_id, 
-                    bldg_points,
-                    planes
-                )
-                self.metadata.append(metadata)
+                building_ids = []
+                for _ in buildings:
+                    building_counter += 1
+                    building_ids.append(f"building_{building_counter:04d}")
                 
-                # Exporter en GLB
-                output_path = self.buildings_dir / f"{building_id}.glb"
-                self.export_to_glb(mesh, output_path)
+                if pool is not None:
+                    futures = {
+                        pool.submit(_process_one_building, building_id, bldg_points, origin): building_id
+                        for building_id, bldg_points in zip(building_ids, buildings)
+                    }
+                    
+                    # Un bâtiment en échec (ou un worker tué) ne doit pas arrêter la tuile
+                    results = {}
+                    broken = False
+                    for future in as_completed(futures):
+                        building_id = futures[future]
+                        try:
+                            metadata = future.result()
+                        except BrokenProcessPool as e:
+                            broken = True
+                            logger.error(f"  ✗ Erreur {building_id}: {e}")
+                            continue
+                        except Exception as e:
+                            logger.error(f"  ✗ Erreur {building_id}: {e}")
+                            continue
+                        if metadata is not None:
+                            results[building_id] = metadata
+                    
+                    # Ordre déterministe des métadonnées
+                    for building_id in building_ids:
+                        if building_id in results:
+                            self.metadata.append(results[building_id])
+                    
+                    # Pool inutilisable après la mort d'un worker : le recréer pour la suite
+                    if broken:
+                        logger.warning("  Pool de processus cassé, recréation")
+                        pool.shutdown(wait=False)
+                        pool = make_pool()
+                    continue
                 
-                all_buildings.append(mesh)
+                # Traiter chaque bâtiment (séquentiel)
+                for building_id, bldg_points in zip(building_ids, buildings):
+                    result = self.process_building(building_id, bldg_points, origin)
+                    if result is not None:
+                        metadata, mesh = result
+                        self.metadata.append(metadata)
+                        all_buildings.append(mesh)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            self._drain_exports()
+        
+        # En parallèle, les meshes sont restés dans les workers : relire les GLB
+        if pool is not None:
+            all_buildings = [
+                o3d.io.read_triangle_mesh(str(self.buildings_dir / f"{building_id}.glb"))
+                for building_id in self.metadata.ids
+            ]
         
         logger.info(f"\n{'=' * 70}")
         logger.info(f"RÉSUMÉ")
@@ -529,6 +1148,49 @@ class MetzBuildingProcessor:
         # Sauvegarder les métadonnées
         self._save_metadata()
     
+    def process_building(self, building_id: str,
+                         bldg_points: np.ndarray,
+                         origin: np.ndarray) -> Optional[Tuple[BuildingMetadata, o3d.geometry.TriangleMesh]]:
+        """Traite un bâtiment : plans, mesh, métadonnées et export GLB
+        
+        Retourne (metadata, mesh), ou None en cas d'échec
+        """
+        logger.info(f"\n  Bâtiment {building_id}: {len(bldg_points):,} points")
+        
+        try:
+            # Open3D (legacy) travaille en float64 contigu : conversion une seule
+            # fois par bâtiment, le même tampon sert à RANSAC et au maillage
+            bldg_points = np.ascontiguousarray(bldg_points, dtype=np.float64)
+            
+            # Extraire les plans
+            planes = self.extract_planes_ransac(bldg_points)
+            logger.info(f"    Plans détectés: {len(planes)}")
+            
+            # Créer le mesh
+            mesh = self.create_building_mesh(bldg_points)
+            logger.info(f"    Mesh: {len(mesh.vertices)} vertices, {len(mesh.triangles)} triangles")
+            
+            # Calculer métadonnées
+            metadata = self.compute_building_metadata(
+                building_id, 
+                bldg_points,
+                planes,
+                origin=origin
+            )
+            
+            # Retour en coordonnées absolues pour l'export
+            mesh.translate(origin)
+            
+            # Exporter en GLB (en arrière-plan, attendu par _drain_exports)
+            output_path = self.buildings_dir / f"{building_id}.glb"
+            self._io_futures.append(self._io_pool.submit(self.export_to_glb, mesh, output_path))
+            
+            return metadata, mesh
+        
+        except Exception as e:
+            logger.error(f"  Erreur {building_id}: {e}")
+            return None
+    
     def _create_merged_model(self, meshes: List[o3d.geometry.TriangleMesh]):
         """
         Crée un fichier GLB unique avec tous les bâtiments
@@ -536,25 +1198,9 @@ class MetzBuildingProcessor:
         """
         logger.info("\nCréation du modèle merged...")
         
-        combined = o3d.geometry.TriangleMesh()
-        
-        for i, mesh in enumerate(meshes):
-            # Nettoyer chaque mesh individuel avant la fusion
-            mesh.remove_duplicated_vertices()
-            mesh.remove_duplicated_triangles()
-            mesh.remove_degenerate_triangles()
-            mesh.remove_non_manifold_edges()
-            
-            # S'assurer que le mesh est orienté correctement
-            mesh.compute_vertex_normals()
-            mesh.normalize_normals()
-            
-            # Ajouter le mesh au modèle combiné
-            # L'opération += préserve les meshes séparés sans créer d'intersections
-            combined += mesh
-            
-            if (i + 1) % 100 == 0:
-                logger.info(f"  Traité {i + 1}/{len(meshes)} bâtiments...")
+        # Un seul tableau de sommets et de triangles pour tous les bâtiments
+        # (normales recalculées après nettoyage)
+        combined = _concatenate_meshes(meshes, keep_normals=False)
         
         # Nettoyage final du mesh combiné
         logger.info("Nettoyage du mesh combiné...")
@@ -576,7 +1222,7 @@ class MetzBuildingProcessor:
         metadata_path = self.output_dir / "metadata.json"
         
         data = {
-            'buildings': [asdict(m) for m in self.metadata],
+            'buildings': self.metadata.to_records(),
             'total_buildings': len(self.metadata),
             'processing_params': {
                 'distance_threshold': self.distance_threshold,
@@ -585,8 +1231,14 @@ class MetzBuildingProcessor:
             }
         }
         
-        with open(metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        if HAS_ORJSON:
+            # Même format (UTF-8, indentation 2), encodé hors de l'interpréteur
+            metadata_path.write_bytes(
+                orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+            )
+        else:
+            with open(metadata_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
         
         logger.info(f"\nMétadonnées sauvegardées: {metadata_path}")
 
@@ -597,7 +1249,8 @@ def main():
     processor = MetzBuildingProcessor(
         input_dir=None,                      # Utilise public/data/metz par défaut
         output_dir=None,                     # Utilise public/models par défaut
-        distance_threshold=0.3               # 30cm de tolérance RANSAC
+        distance_threshold=0.3,              # 30cm de tolérance RANSAC
+        max_workers=None                     # Un processus par cœur pour les bâtiments
     )
     
     processor.process_all()
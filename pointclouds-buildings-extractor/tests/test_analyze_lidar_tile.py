@@ -0,0 +1,52 @@
+"""
+Tests de l'estimation d'espacement par grille (analyze_lidar_tile.py)
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+for _module in ("open3d", "laspy", "matplotlib", "sklearn"):
+    pytest.importorskip(_module)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from analyze_lidar_tile import LidarTileAnalyzer  # noqa: E402
+
+
+def _synthetic_buildings(n_buildings: int = 20, points_per_building: int = 5000,
+                         size: float = 10.0, gap: float = 30.0) -> np.ndarray:
+    """Bâtiments carrés denses (toit + bruit en Z), espacés sur une grille"""
+    rng = np.random.default_rng(0)
+    side = int(np.ceil(np.sqrt(n_buildings)))
+    blocks = []
+    for b in range(n_buildings):
+        ox, oy = (b % side) * gap, (b // side) * gap
+        xy = rng.uniform(0.0, size, (points_per_building, 2)) + (ox, oy)
+        z = 10.0 + rng.normal(0.0, 0.1, points_per_building)
+        blocks.append(np.column_stack((xy, z)))
+    return np.concatenate(blocks).astype(np.float32)
+
+
+@pytest.mark.parametrize("sample_size", [5000, 20000])
+def test_grid_spacing_matches_knn_at_same_sample_size(tmp_path, sample_size):
+    analyzer = LidarTileAnalyzer(tmp_path / "tile.laz", use_gpu=False, use_cache=False)
+    points = _synthetic_buildings()
+
+    grid = analyzer._estimate_spacing_grid(points, sample_size=sample_size)
+    knn = analyzer.estimate_point_spacing(points, sample_size=sample_size)
+
+    # La grille (O(N)) doit donner la même échelle que le k-NN sur l'échantillon
+    assert grid['p50'] == pytest.approx(knn['p50'], rel=0.1)
+
+
+def test_grid_spacing_without_sample_size_is_full_density(tmp_path):
+    analyzer = LidarTileAnalyzer(tmp_path / "tile.laz", use_gpu=False, use_cache=False)
+    points = _synthetic_buildings()
+
+    full = analyzer._estimate_spacing_grid(points)
+    sampled = analyzer._estimate_spacing_grid(points, sample_size=len(points) // 16)
+
+    # Densité divisée par 16 : espacement multiplié par 4
+    assert sampled['p50'] == pytest.approx(4 * full['p50'], rel=0.05)